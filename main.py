@@ -1,23 +1,29 @@
+import asyncio
 import logging
 import os
-import tempfile
 from datetime import datetime
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PayloadSchemaType, TextIndexParams, TokenizerType
 
-from apps.school_web_site_agent.orchestrator import orchestrator
+from apps.school_web_site_agent.orchestrator import fast_router, orchestrator
+from apps.school_web_site_agent.tools import page_cache
 from apps.course_helper_agent.graph import graph as course_helper_graph
+from apps.course_helper_agent.tool import answer_cache as course_answer_cache
+from core.pdf_loader import load_pdf
+from core.browser_pool import browser_pool
+from core.embedding_cache import cached_openai_embeddings, query_cache_stats
+from core.hybrid_search import HybridSearch, sparse_vectors_config
+from core.sparse import TurkishBM25
+from settings import settings
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from apps.school_web_site_agent.context import Context
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import HumanMessage, AIMessageChunk
 import json
 
 app = FastAPI()
@@ -63,7 +69,7 @@ async def query_agent(request: QueryRequest):
         )
         tool_response = False
         try:
-            for chunk in orchestrator.stream(
+            async for chunk in orchestrator.astream(
                     {"messages": [{"role": "user", "content": request.message}]},
                     stream_mode=["messages","custom"],
                     config=config,
@@ -79,7 +85,7 @@ async def query_agent(request: QueryRequest):
                 if isinstance(data, dict) and 'agent' in data:
                     agent_name = data['agent']
                     if agent_name:
-                        yield f"data: {json.dumps({'type': 'agent_decision', 'agent_name': agent_name})}\n\n"
+                        yield f"data: {json.dumps({'type': 'agent_decision', 'agent_name': agent_name, 'routing_stage': data.get('routing_stage')})}\n\n"
                         print(f"Routed to agent: {agent_name}")
                     else:
                         print("No agent routing information found")
@@ -155,6 +161,10 @@ async def query_course_helper(request: CourseQueryRequest):
     - Node transitions (retrieve, generate)
     - Retrieved document information
     - Generated answer chunks
+    - Citation footer, as a final 'citations' event
+
+    Answers served from the per-course answer cache arrive as a single
+    'message' event with cached=true, followed by the 'citations' event.
     """
     async def event_generator():
         config = {"configurable": {"thread_id": request.thread_id}}
@@ -163,17 +173,20 @@ async def query_course_helper(request: CourseQueryRequest):
             "messages": [HumanMessage(content=request.message)],
             "course_id": request.course_id,
             "retrieved_documents": None,
-            "context": None,
-            "needs_retrieval": True
+            "retrieval_ref": None,
+            "context_tokens": None,
+            "needs_retrieval": True,
+            "cached_answer": None,
+            "answer_cache_version": None
         }
 
         try:
             yield f"data: {json.dumps({'type': 'agent_start', 'agent': 'course_helper'})}\n\n"
 
-            for chunk in course_helper_graph.stream(
+            async for chunk in course_helper_graph.astream(
                 state,
                 config=config,
-                stream_mode=["messages", "updates"],
+                stream_mode=["messages", "updates", "custom"],
                 subgraphs=True
             ):
                 if isinstance(chunk, tuple) and len(chunk) == 3:
@@ -191,9 +204,10 @@ async def query_course_helper(request: CourseQueryRequest):
                                         'type': 'documents_retrieved',
                                         'count': len(docs),
                                         'course_id': request.course_id,
+                                        'context_tokens': node_data.get('context_tokens'),
                                         'documents': [{
                                             'relevance_score': doc.get('relevance_score', 0),
-                                            'source': doc.get('metadata', {}).get('source', 'Unknown')
+                                            'source': doc.get('source', 'Unknown')
                                         } for doc in docs[:3]]
                                     })}\n\n"
                                 else:
@@ -209,12 +223,25 @@ async def query_course_helper(request: CourseQueryRequest):
                         print(metadata)
                         node_name = metadata.get("langgraph_node", "")
 
-                        if node_name == "generate" and hasattr(message, "content"):
+                        # Only token chunks are forwarded; the finished AIMessage that
+                        # generate returns is echoed as a plain AIMessage and skipped.
+                        if node_name == "generate" and isinstance(message, AIMessageChunk):
                             content = message.content
 
-                            if content and len(content) < 20:
+                            if content:
                                 yield f"data: {json.dumps({'type': 'message', 'content': content})}\n\n"
 
+                    elif stream_type == "custom" and isinstance(data, dict) and "answer" in data:
+                        # Answer served from the course's semantic answer cache
+                        yield f"data: {json.dumps({'type': 'message', 'content': data['answer'], 'cached': True})}\n\n"
+
+                    elif stream_type == "custom" and isinstance(data, dict) and "citations" in data:
+                        yield f"data: {json.dumps({
+                            'type': 'citations',
+                            'content': data['citations'],
+                            'count': data.get('count', 0)
+                        })}\n\n"
+
         except Exception as e:
             logging.error(f"Error in course helper stream: {str(e)}")
             error_data = {
@@ -242,6 +269,22 @@ async def say_hello(name: str):
     return {"message": f"Hello {name}"}
 
 
+@app.get("/stats")
+async def get_stats():
+    """
+    Hit/miss counters of this worker's caches, router and browser pool.
+
+    Each uvicorn worker keeps its own counters, so with several workers the
+    response describes the worker that served the request.
+    """
+    return {
+        "query_embeddings": query_cache_stats(),
+        "announcement_pages": page_cache.stats(),
+        "router": fast_router.stats() if fast_router is not None else None,
+        "browser_pool": browser_pool.stats(),
+    }
+
+
 @app.post("/embed")
 async def embed_document(
     collection_name: str = Form(...),
@@ -265,8 +308,6 @@ async def embed_document(
     Returns:
     - Success message with document count
     """
-    temp_path = None
-
     try:
         if not file.filename.endswith('.pdf'):
             raise HTTPException(status_code=400, detail="Only PDF files are supported")
@@ -276,7 +317,7 @@ async def embed_document(
 
         qdrant_client = QdrantClient(url=qdrant_url, api_key=qdrant_api_key, timeout=120)
 
-        embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+        embeddings = cached_openai_embeddings(model="text-embedding-3-large")
 
         collections = qdrant_client.get_collections().collections
         collection_exists = any(col.name == collection_name for col in collections)
@@ -284,24 +325,22 @@ async def embed_document(
         if not collection_exists:
             qdrant_client.create_collection(
                 collection_name=collection_name,
-                vectors_config=VectorParams(size=3072, distance=Distance.COSINE)
+                vectors_config=VectorParams(size=3072, distance=Distance.COSINE),
+                sparse_vectors_config=sparse_vectors_config(settings.sparse_vector_name)
             )
             logging.info(f"Created new collection: {collection_name}")
         else:
             logging.info(f"Using existing collection: {collection_name}")
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            temp_path = tmp_file.name
-            content = await file.read()
-            tmp_file.write(content)
-
-        loader = PyPDFLoader(temp_path)
-        documents = loader.load()
+        # Parse straight from the spooled upload; pypdf reads it incrementally
+        documents = await asyncio.to_thread(load_pdf, file.file, file.filename)
 
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
+            # Lets the course helper merge neighbouring chunks without repeating the overlap
+            add_start_index=True,
         )
         splits = text_splitter.split_documents(documents)
 
@@ -320,7 +359,18 @@ async def embed_document(
             timeout=120,
         )
 
-        vector_store.add_documents(splits)
+        ids = vector_store.add_documents(splits)
+
+        # BM25 vectors for hybrid search; skipped for collections without the sparse vector
+        HybridSearch(vector_store, TurkishBM25(), settings.sparse_vector_name).add_sparse_vectors(
+            ids, [doc.page_content for doc in splits]
+        )
+
+        # Cached answers for this course may no longer reflect its documents
+        course_answer_cache.invalidate(course_id)
+
+        embedding_cache_stats = embeddings.stats()
+        logging.info(f"Embedding cache for {file.filename}: {embedding_cache_stats}")
 
         return {
             "status": "success",
@@ -333,14 +383,10 @@ async def embed_document(
             "course_id": course_id,
             "document_id": document_id,
             "uploaded_at": datetime.now().isoformat(),
-            "collection_existed": collection_exists
+            "collection_existed": collection_exists,
+            "embedding_cache": embedding_cache_stats
         }
 
     except Exception as e:
         logging.error(f"Error processing document: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
-
-    finally:
-        # Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
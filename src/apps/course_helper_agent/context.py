@@ -0,0 +1,215 @@
+"""
+Assembly of retrieved documents into the course helper prompt.
+
+merge_chunks joins neighbouring chunks of the same document page and drops
+the text they repeat (/embed splits with a 200-character overlap);
+pack_context then fills a token budget with the result, rendering only the
+whitelisted citation fields of each document's metadata.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from core.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+
+HEADER = "# Retrieved Course Materials\n"
+TRUNCATED_MARK = "\n[...]"
+
+# Shortest repeated text taken as chunk overlap when chunks carry no start_index
+MIN_OVERLAP_CHARS = 20
+# Longest overlap searched for; /embed uses chunk_overlap=200
+MAX_OVERLAP_CHARS = 400
+
+
+@dataclass
+class PackedContext:
+    """
+    Attributes:
+        text: Context for the prompt
+        documents: Documents included, in prompt order
+        used_tokens: Tokens of text
+        available_tokens: Budget the context was packed into
+        dropped: Documents left out because they did not fit
+        truncated: Whether the most relevant document was cut to fit
+    """
+    text: str
+    documents: list
+    used_tokens: int
+    available_tokens: int
+    dropped: list = field(default_factory=list)
+    truncated: bool = False
+
+    def report(self) -> dict:
+        return {
+            "used": self.used_tokens,
+            "available": self.available_tokens,
+            "documents": len(self.documents),
+            "dropped": len(self.dropped),
+            "truncated": self.truncated,
+        }
+
+
+def _page_key(document: dict) -> tuple:
+    metadata = document.get("metadata", {})
+    return metadata.get("document-id") or metadata.get("source"), metadata.get("page")
+
+
+def _text_overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of first that is a prefix of second."""
+    for length in range(min(len(first), len(second), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+def _join(first: dict, second: dict) -> Optional[dict]:
+    """first and second merged into one document, or None if they are not neighbours."""
+    start = first["metadata"].get("start_index")
+    next_start = second["metadata"].get("start_index")
+
+    if start is not None and next_start is not None:
+        overlap = start + len(first["content"]) - next_start
+        if next_start < start or overlap < 0:
+            return None
+    else:
+        overlap = _text_overlap(first["content"], second["content"])
+        if not overlap:
+            return None
+
+    return {
+        **first,
+        "content": first["content"] + second["content"][overlap:],
+        "relevance_score": max(first.get("relevance_score", 0), second.get("relevance_score", 0)),
+    }
+
+
+def merge_chunks(documents: list) -> list:
+    """
+    Merge overlapping or adjacent chunks of the same document page.
+
+    Chunks are matched on metadata start_index when present (set by /embed),
+    otherwise on text shared between the end of one chunk and the start of
+    the next. A merged document keeps the higher relevance score.
+
+    Args:
+        documents: Retrieved documents ({"content", "metadata", "relevance_score"})
+
+    Returns:
+        Documents with neighbours merged, most relevant first
+    """
+    pages: dict[tuple, list] = {}
+    for document in documents:
+        document = {**document, "metadata": document.get("metadata") or {}}
+        pages.setdefault(_page_key(document), []).append(document)
+
+    merged = []
+    for chunks in pages.values():
+        if all(chunk["metadata"].get("start_index") is not None for chunk in chunks):
+            chunks.sort(key=lambda chunk: chunk["metadata"]["start_index"])
+
+        remaining = list(chunks)
+        while remaining:
+            current = remaining.pop(0)
+            # Without start_index the order is unknown, so try both directions
+            joined = True
+            while joined:
+                joined = False
+                for i, other in enumerate(remaining):
+                    combined = _join(current, other) or _join(other, current)
+                    if combined is not None:
+                        current = combined
+                        del remaining[i]
+                        joined = True
+                        break
+            merged.append(current)
+
+    if len(merged) < len(documents):
+        logger.info(f"Merged {len(documents)} retrieved chunks into {len(merged)} passages")
+    return sorted(merged, key=lambda document: document.get("relevance_score", 0), reverse=True)
+
+
+def format_document(index: int, document: dict, fields: Optional[Sequence[str]] = None) -> str:
+    metadata = document.get("metadata", {})
+    parts = [f"## Document {index} (Relevance: {document.get('relevance_score', 0):.2f})"]
+
+    if fields is not None:
+        metadata = {key: metadata[key] for key in fields if metadata.get(key) not in (None, "")}
+    else:
+        metadata = {key: value for key, value in metadata.items() if key != "course_id"}
+
+    if metadata:
+        parts.append("**Metadata:**")
+        for key, value in metadata.items():
+            parts.append(f"- {key}: {value}")
+
+    parts.append(f"\n**Content:**\n{document['content']}\n")
+    parts.append("---\n")
+    return "\n".join(parts)
+
+
+def pack_context(documents: list, max_tokens: int, fields: Optional[Sequence[str]] = None) -> PackedContext:
+    """
+    Fill the token budget greedily, most relevant document first.
+
+    A document that does not fit is skipped and smaller, less relevant ones
+    are still tried. If not even the most relevant document fits, its
+    content is truncated to the budget, so the result never exceeds it.
+
+    Args:
+        documents: Retrieved documents ({"content", "metadata", "relevance_score"})
+        max_tokens: Token budget for the whole context
+        fields: Metadata keys rendered for each document, or None for all but course_id
+
+    Returns:
+        The packed context and its token usage
+    """
+    ranked = sorted(documents, key=lambda doc: doc.get("relevance_score", 0), reverse=True)
+
+    used = count_tokens(HEADER)
+    selected, dropped = [], []
+    blocks = []
+
+    for document in ranked:
+        block = format_document(len(selected) + 1, document, fields)
+        # Blocks are joined with newlines
+        tokens = count_tokens(block) + 1
+        if used + tokens <= max_tokens:
+            selected.append(document)
+            blocks.append(block)
+            used += tokens
+        else:
+            dropped.append(document)
+
+    truncated = False
+    if not selected and ranked:
+        document = ranked[0]
+        empty_block = format_document(1, {**document, "content": TRUNCATED_MARK}, fields)
+        room = max_tokens - used - count_tokens(empty_block) - 1
+        if room > 0:
+            content = truncate_to_tokens(document["content"], room) + TRUNCATED_MARK
+            blocks.append(format_document(1, {**document, "content": content}, fields))
+            selected.append(document)
+            dropped.remove(document)
+            truncated = True
+
+    text = "\n".join([HEADER, *blocks])
+    # Tokens can merge across block boundaries; the joined text is what must fit
+    while blocks and count_tokens(text) > max_tokens:
+        blocks.pop()
+        dropped.append(selected.pop())
+        text = "\n".join([HEADER, *blocks])
+    if not blocks:
+        text = ""
+
+    packed = PackedContext(text, selected, count_tokens(text), max_tokens, dropped, truncated)
+
+    if dropped or truncated:
+        logger.warning(
+            f"Context budget: {packed.used_tokens}/{max_tokens} tokens, "
+            f"{len(dropped)} documents dropped{', top document truncated' if truncated else ''}"
+        )
+    return packed
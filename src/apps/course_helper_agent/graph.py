@@ -1,23 +1,37 @@
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 import logging
 from apps.course_helper_agent.state import State
 from apps.course_helper_agent.nodes.retrieval import retrieve_node
-from apps.course_helper_agent.nodes.generate import generate_node
+from apps.course_helper_agent.nodes.generate import generate_node, agenerate_node
+from apps.course_helper_agent.nodes.answer_cache import (
+    check_cache_node,
+    acheck_cache_node,
+    cached_answer_node,
+    route_after_cache_check,
+)
+from core.checkpointer import create_checkpointer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_course_helper_graph():
+def create_course_helper_graph(checkpointer: BaseCheckpointSaver | None = None):
     """
     Create the course helper RAG agent graph.
 
     The graph follows this flow:
-    1. START -> retrieve_node: Retrieve relevant course documents
-    2. retrieve_node -> generate_node: Generate answer using retrieved context
-    3. generate_node -> END: Return answer to user
+    1. START -> check_cache_node: Look the question up in the course's answer cache
+    2. On a hit: cached_answer_node -> END: Return the cached answer
+    3. On a miss: retrieve_node: Retrieve relevant course documents
+    4. retrieve_node -> generate_node: Generate answer using retrieved context
+    5. generate_node -> END: Return answer to user
+
+    Args:
+        checkpointer: Checkpointer to compile with; defaults to the backend
+                      selected by settings.checkpoint_backend
 
     Returns:
         Compiled LangGraph with checkpointing enabled
@@ -25,15 +39,20 @@ def create_course_helper_graph():
     workflow = StateGraph(State)
 
     # Add nodes
+    workflow.add_node("check_cache", RunnableLambda(check_cache_node, afunc=acheck_cache_node, name="check_cache"))
+    workflow.add_node("cached_answer", cached_answer_node)
     workflow.add_node("retrieve", retrieve_node)
-    workflow.add_node("generate", generate_node)
+    workflow.add_node("generate", RunnableLambda(generate_node, afunc=agenerate_node, name="generate"))
 
     # Define edges
-    workflow.add_edge(START, "retrieve")
+    workflow.add_edge(START, "check_cache")
+    workflow.add_conditional_edges("check_cache", route_after_cache_check, ["cached_answer", "retrieve"])
+    workflow.add_edge("cached_answer", END)
     workflow.add_edge("retrieve", "generate")
     workflow.add_edge("generate", END)
 
-    checkpointer = InMemorySaver()
+    if checkpointer is None:
+        checkpointer = create_checkpointer("course_helper")
     graph = workflow.compile(checkpointer=checkpointer)
 
     logger.info("Course helper graph created successfully")
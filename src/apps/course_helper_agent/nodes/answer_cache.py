@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from langchain_core.messages import AIMessage
+from langgraph.config import get_stream_writer
+
+from ..state import State
+from ..tool import answer_cache, embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _cacheable_query(state: State) -> Optional[str]:
+    """
+    Return the question if its answer can be shared across students.
+
+    Only the first question of a thread qualifies: later turns are answered
+    with the conversation history and may depend on it.
+    """
+    messages = state.get("messages", [])
+    if len(messages) != 1 or not state.get("course_id"):
+        return None
+
+    message = messages[-1]
+    query = message.content if hasattr(message, "content") else str(message)
+    return query if isinstance(query, str) and query.strip() else None
+
+
+def _cache_lookup_result(state: State, version: Optional[int], vector: list[float]) -> Dict[str, Any]:
+    hit = answer_cache.lookup(state["course_id"], vector, version)
+    if hit is None:
+        return {"cached_answer": None, "answer_cache_version": version}
+
+    logger.info(f"Answer cache hit for course '{state['course_id']}' (similarity {hit.similarity:.3f})")
+    return {
+        "cached_answer": {
+            "answer": hit.answer,
+            "citations": hit.citations,
+            "count": hit.citation_count,
+            "similarity": hit.similarity,
+        },
+        "answer_cache_version": version,
+    }
+
+
+def check_cache_node(state: State) -> Dict[str, Any]:
+    """
+    Look the question up in the course's semantic answer cache.
+
+    The query embedding comes from the shared query LRU, so a miss costs no
+    extra embedding call: retrieval reuses the same vector. The partition
+    version is read here, before retrieval, and kept in state so the answer
+    is only stored if the course's documents did not change in between.
+
+    Args:
+        state: Current agent state
+
+    Returns:
+        Updated state with cached_answer set on a hit, None otherwise, and
+        the partition version the lookup ran against
+    """
+    query = _cacheable_query(state)
+    if query is None:
+        return {"cached_answer": None, "answer_cache_version": None}
+
+    version = answer_cache.version(state["course_id"])
+    try:
+        return _cache_lookup_result(state, version, embeddings.embed_query(query))
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return {"cached_answer": None, "answer_cache_version": version}
+
+
+async def acheck_cache_node(state: State) -> Dict[str, Any]:
+    """Async variant of check_cache_node; the version is read off the event loop."""
+    query = _cacheable_query(state)
+    if query is None:
+        return {"cached_answer": None, "answer_cache_version": None}
+
+    version = await asyncio.to_thread(answer_cache.version, state["course_id"])
+    try:
+        return _cache_lookup_result(state, version, await embeddings.aembed_query(query))
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return {"cached_answer": None, "answer_cache_version": version}
+
+
+def route_after_cache_check(state: State) -> str:
+    return "cached_answer" if state.get("cached_answer") else "retrieve"
+
+
+def cached_answer_node(state: State) -> Dict[str, Any]:
+    """
+    Serve a cached answer without retrieval or generation.
+
+    The answer and its citation footer are emitted as custom stream events,
+    in the same order a generated answer reaches the client.
+
+    Args:
+        state: Current agent state with cached_answer set
+
+    Returns:
+        Updated state with the cached AI response
+    """
+    cached = state["cached_answer"]
+    answer = cached["answer"]
+
+    writer = get_stream_writer()
+    writer({"answer": answer, "cached": True, "similarity": cached.get("similarity")})
+
+    if cached.get("citations"):
+        writer({"citations": cached["citations"], "count": cached.get("count", 0)})
+        answer += cached["citations"]
+
+    return {
+        "messages": [AIMessage(content=answer)]
+    }
+
+
+def _should_remember(state: State) -> Optional[str]:
+    # Answers produced without course material (or after a retrieval error) are not reused
+    if not state.get("retrieved_documents"):
+        return None
+    return _cacheable_query(state)
+
+
+def remember_answer(state: State, answer: str, citations: Optional[str]):
+    """
+    Store a freshly generated answer in the course's answer cache, under the
+    partition version check_cache_node read before retrieval.
+    """
+    query = _should_remember(state)
+    if query is None:
+        return
+
+    try:
+        vector = embeddings.embed_query(query)
+        answer_cache.store(
+            state["course_id"],
+            state.get("answer_cache_version"),
+            query,
+            vector,
+            answer,
+            citations,
+            len(state["retrieved_documents"]),
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache answer: {e}")
+
+
+async def aremember_answer(state: State, answer: str, citations: Optional[str]):
+    """Async variant of remember_answer; the version check runs off the event loop."""
+    query = _should_remember(state)
+    if query is None:
+        return
+
+    try:
+        vector = await embeddings.aembed_query(query)
+        await asyncio.to_thread(
+            answer_cache.store,
+            state["course_id"],
+            state.get("answer_cache_version"),
+            query,
+            vector,
+            answer,
+            citations,
+            len(state["retrieved_documents"]),
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache answer: {e}")
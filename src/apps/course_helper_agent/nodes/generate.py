@@ -2,8 +2,15 @@ import logging
 from typing import Any, Dict
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 
 from ..state import State
+from .answer_cache import remember_answer, aremember_answer
+from .history import afold_summary, fold_summary, history_messages, plan_window
+from .retrieval import load_retrieval
+from core.tokens import count_message_tokens, count_tokens
+from settings import settings
 from src.core.llm import llm
 
 logger = logging.getLogger(__name__)
@@ -27,25 +34,19 @@ RAG_SYSTEM_PROMPT = """You are a helpful course assistant. Your role is to answe
 """
 
 
-def generate_node(state: State) -> Dict[str, Any]:
+def _prepare_generation(state: State, config: RunnableConfig) -> Dict[str, Any] | None:
     """
-    Generation node for RAG pipeline.
-
-    Uses LLM to generate answer based on retrieved context and conversation history.
-
-    Args:
-        state: Current agent state with retrieved documents and context
+    Build the prompt chain and its inputs from the current state.
 
-    Returns:
-        Updated state with AI response
+    Returns None when there is no user message to answer.
     """
-    context = state.get("context", "")
+    context = load_retrieval(state, config)["context"]
     messages = state.get("messages", [])
     course_id = state.get("course_id", "unknown")
 
     if not messages:
         logger.warning("No messages found in state")
-        return {"messages": []}
+        return None
 
     last_user_message = messages[-1]
     user_query = last_user_message.content if hasattr(last_user_message, "content") else str(last_user_message)
@@ -61,38 +62,128 @@ def generate_node(state: State) -> Dict[str, Any]:
         ("human", "{question}")
     ])
 
-    chat_history = messages[:-1] if len(messages) > 1 else []
-
-    try:
-        chain = prompt_template | llm
-
-        response = chain.invoke({
+    # History gets what the budget leaves after the fixed prompt parts and the summary
+    fixed_tokens = (
+        count_tokens(RAG_SYSTEM_PROMPT)
+        + count_tokens(f"Course ID: {course_id}\n\n{context}")
+        + count_message_tokens([last_user_message])
+        + settings.course_summary_max_tokens
+    )
+    window = plan_window(
+        messages[:-1],
+        state.get("history_summary"),
+        settings.course_prompt_max_tokens - fixed_tokens,
+    )
+    logger.info(f"History window: {len(window.messages)} messages verbatim, {len(window.fold)} to summarize")
+
+    return {
+        "chain": prompt_template | llm,
+        "window": window,
+        "inputs": {
             "course_id": course_id,
             "context": context,
-            "chat_history": chat_history,
             "question": user_query
-        })
+        }
+    }
 
-        if hasattr(response, "content"):
-            answer = response.content
-        else:
-            answer = str(response)
 
-        logger.info(f"Generated answer: {len(answer)} characters")
+def _citation_footer(state: State) -> str | None:
+    retrieved_docs = state.get("retrieved_documents", [])
+    if retrieved_docs and len(retrieved_docs) > 0:
+        return "\n\n---\n*Based on {} course material(s)*".format(len(retrieved_docs))
+    return None
 
-        retrieved_docs = state.get("retrieved_documents", [])
-        if retrieved_docs and len(retrieved_docs) > 0:
-            citations = "\n\n---\n*Based on {} course material(s)*".format(len(retrieved_docs))
-            answer += citations
 
-        return {
-            "messages": [AIMessage(content=answer)]
-        }
+def _finalize_answer(state: State, answer: str) -> Dict[str, Any]:
+    """
+    Append the citation footer and emit it as its own custom stream event,
+    so clients receive the LLM tokens first and the footer last.
+    """
+    logger.info(f"Generated answer: {len(answer)} characters")
+
+    retrieved_docs = state.get("retrieved_documents", [])
+    citations = _citation_footer(state)
+    if citations:
+        answer += citations
+
+        writer = get_stream_writer()
+        writer({"citations": citations, "count": len(retrieved_docs)})
+
+    return {
+        "messages": [AIMessage(content=answer)]
+    }
+
+
+def _generation_error(e: Exception) -> Dict[str, Any]:
+    error_msg = f"Error generating response: {str(e)}"
+    logger.error(error_msg)
+
+    return {
+        "messages": [AIMessage(content=f"I apologize, but I encountered an error while generating the response. Please try again.")]
+    }
+
+
+def generate_node(state: State, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Generation node for RAG pipeline.
+
+    Uses LLM to generate answer based on retrieved context and conversation history.
+    The history is limited to settings.course_prompt_max_tokens together
+    with the context; older turns are folded into a running summary.
+    The answer is produced with chain.stream so token chunks reach the
+    "messages" stream mode as soon as the model emits them.
+
+    Args:
+        state: Current agent state with retrieved documents and context
+        config: Run config, used to load the retrieved context
+
+    Returns:
+        Updated state with AI response
+    """
+    prepared = _prepare_generation(state, config)
+    if prepared is None:
+        return {"messages": []}
+
+    try:
+        summary = fold_summary(prepared["window"], settings.course_summary_max_tokens)
+        inputs = {**prepared["inputs"], "chat_history": history_messages(prepared["window"], summary)}
+
+        answer = ""
+        for chunk in prepared["chain"].stream(inputs):
+            answer += chunk.content if hasattr(chunk, "content") else str(chunk)
+
+        remember_answer(state, answer, _citation_footer(state))
+        return {**_finalize_answer(state, answer), "history_summary": summary}
 
     except Exception as e:
-        error_msg = f"Error generating response: {str(e)}"
-        logger.error(error_msg)
+        return _generation_error(e)
 
-        return {
-            "messages": [AIMessage(content=f"I apologize, but I encountered an error while generating the response. Please try again.")]
-        }
+
+async def agenerate_node(state: State, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Async variant of generate_node, used when the graph runs under astream.
+
+    Args:
+        state: Current agent state with retrieved documents and context
+        config: Run config, used to load the retrieved context
+
+    Returns:
+        Updated state with AI response
+    """
+    prepared = _prepare_generation(state, config)
+    if prepared is None:
+        return {"messages": []}
+
+    try:
+        summary = await afold_summary(prepared["window"], settings.course_summary_max_tokens)
+        inputs = {**prepared["inputs"], "chat_history": history_messages(prepared["window"], summary)}
+
+        answer = ""
+        async for chunk in prepared["chain"].astream(inputs):
+            answer += chunk.content if hasattr(chunk, "content") else str(chunk)
+
+        await aremember_answer(state, answer, _citation_footer(state))
+        return {**_finalize_answer(state, answer), "history_summary": summary}
+
+    except Exception as e:
+        return _generation_error(e)
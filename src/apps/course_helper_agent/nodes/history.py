@@ -0,0 +1,123 @@
+"""
+Token-budgeted conversation window for the generate node.
+
+The prompt budget (settings.course_prompt_max_tokens) covers the system
+prompt, retrieved context, conversation history and question. The newest
+turns that fit in what the context and question leave over are sent
+verbatim; older turns are folded into a running summary stored in state
+(history_summary).
+
+The summary is only recomputed when the window has to move. It then moves
+far enough to leave half of the history budget free, so a long session
+pays for one summary call every few turns instead of every turn, and the
+summary call only reads the previous summary plus the newly evicted turns.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from core.tokens import count_message_tokens
+from src.core.llm import llm
+
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_PROMPT = """Summarize the earlier part of a conversation between a student and a course assistant.
+Keep the topics asked about, the key facts and answers given, and any open questions.
+Write in the language of the conversation, in at most {max_tokens} tokens.
+
+Previous summary:
+{summary}
+
+Conversation to add:
+{conversation}"""
+
+# Summary calls run inside the generate node; keep their tokens out of the answer stream
+SUMMARY_CONFIG = {"tags": ["nostream"], "run_name": "history_summary"}
+
+
+@dataclass
+class HistoryWindow:
+    """
+    Attributes:
+        messages: Newest history messages sent verbatim
+        summary: Summary state before folding ({"covered", "text"}), if any
+        fold: Older messages to add to the summary before generating
+        covered: Number of history messages the summary covers after folding
+    """
+    messages: list
+    summary: Optional[dict]
+    fold: list = field(default_factory=list)
+    covered: int = 0
+
+
+def plan_window(history: list[BaseMessage], summary: Optional[dict], available_tokens: int) -> HistoryWindow:
+    """
+    Choose the verbatim window for a prompt.
+
+    Args:
+        history: Conversation before the current question
+        summary: history_summary from state
+        available_tokens: Tokens left for history after the fixed prompt parts
+
+    Returns:
+        The window and the messages that must be folded into the summary
+    """
+    covered = min(summary["covered"], len(history)) if summary else 0
+    available_tokens = max(available_tokens, 0)
+
+    if count_message_tokens(history[covered:]) <= available_tokens:
+        return HistoryWindow(history[covered:], summary, covered=covered)
+
+    # Move the window to a turn boundary that leaves half of the budget free
+    target = available_tokens // 2
+    starts = [i for i in range(covered + 1, len(history)) if isinstance(history[i], HumanMessage)] + [len(history)]
+    start = next(i for i in starts if count_message_tokens(history[i:]) <= target)
+
+    return HistoryWindow(history[start:], summary, fold=history[covered:start], covered=start)
+
+
+def _summary_input(window: HistoryWindow, max_tokens: int) -> str:
+    conversation = "\n\n".join(f"{message.type}: {message.content}" for message in window.fold)
+    previous = window.summary["text"] if window.summary else "(none)"
+    return SUMMARY_PROMPT.format(max_tokens=max_tokens, summary=previous, conversation=conversation)
+
+
+def fold_summary(window: HistoryWindow, max_tokens: int) -> Optional[dict]:
+    """Summary state after folding window.fold; unchanged if there is nothing to fold or the call fails."""
+    if not window.fold:
+        return window.summary
+
+    try:
+        response = llm.invoke(_summary_input(window, max_tokens), config=SUMMARY_CONFIG)
+    except Exception as e:
+        logger.warning(f"History summary failed, keeping the previous one: {e}")
+        return window.summary
+
+    logger.info(f"Folded {len(window.fold)} messages into the history summary")
+    return {"covered": window.covered, "text": response.content}
+
+
+async def afold_summary(window: HistoryWindow, max_tokens: int) -> Optional[dict]:
+    """Async variant of fold_summary."""
+    if not window.fold:
+        return window.summary
+
+    try:
+        response = await llm.ainvoke(_summary_input(window, max_tokens), config=SUMMARY_CONFIG)
+    except Exception as e:
+        logger.warning(f"History summary failed, keeping the previous one: {e}")
+        return window.summary
+
+    logger.info(f"Folded {len(window.fold)} messages into the history summary")
+    return {"covered": window.covered, "text": response.content}
+
+
+def history_messages(window: HistoryWindow, summary: Optional[dict]) -> list[BaseMessage]:
+    """Chat history for the prompt: the summary (if any) followed by the verbatim window."""
+    if not summary:
+        return window.messages
+    return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary['text']}"), *window.messages]
@@ -1,36 +1,75 @@
 import logging
 from typing import Any, Dict
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 
+from ..context import merge_chunks, pack_context
 from ..state import State
 from ..tool import retrieve_course_documents
+from core.blob_store import blob_store
+from settings import settings
 
 logger = logging.getLogger(__name__)
 
 
-def retrieve_node(state: State) -> Dict[str, Any]:
+BLOB_NAMESPACE = "course_helper"
+
+
+def _retrieval_update(
+    config: RunnableConfig,
+    documents: list,
+    context: str,
+    context_tokens: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """
+    Keep the documents and context in blob_store; state only gets document
+    summaries and a reference, so checkpoints stay small as the thread grows.
+    """
+    ref = blob_store.put(
+        BLOB_NAMESPACE,
+        config["configurable"]["thread_id"],
+        {"documents": documents, "context": context}
+    )
+
+    return {
+        "retrieved_documents": [{
+            "relevance_score": doc.get("relevance_score", 0),
+            "source": doc.get("metadata", {}).get("source", "Unknown")
+        } for doc in documents],
+        "retrieval_ref": ref,
+        "context_tokens": context_tokens,
+        "needs_retrieval": False
+    }
+
+
+def load_retrieval(state: State, config: RunnableConfig) -> Dict[str, Any]:
+    """Return the documents and context stored by retrieve_node for this turn."""
+    payload = blob_store.get(BLOB_NAMESPACE, config["configurable"]["thread_id"], state.get("retrieval_ref"))
+    return payload or {"documents": [], "context": ""}
+
+
+def retrieve_node(state: State, config: RunnableConfig) -> Dict[str, Any]:
     """
     Retrieval node for RAG pipeline.
 
     Extracts the user's query from messages, retrieves relevant documents
-    from vector store filtered by course_id, and formats context.
+    from vector store filtered by course_id, and packs them into a context
+    of at most settings.course_context_max_tokens tokens.
 
     Args:
         state: Current agent state
+        config: Run config; its thread_id scopes the stored payload
 
     Returns:
-        Updated state with retrieved documents and formatted context
+        Updated state with document summaries and a reference to the
+        retrieved documents and formatted context
     """
     logger.info("=== Retrieval Node ===")
 
     messages = state.get("messages", [])
     if not messages:
         logger.warning("No messages found in state")
-        return {
-            "retrieved_documents": [],
-            "context": "",
-            "needs_retrieval": False
-        }
+        return _retrieval_update(config, [], "")
 
     last_message = messages[-1]
     query = last_message.content if hasattr(last_message, "content") else str(last_message)
@@ -38,11 +77,7 @@ def retrieve_node(state: State) -> Dict[str, Any]:
     course_id = state.get("course_id")
     if not course_id:
         logger.error("No course_id provided in state")
-        return {
-            "retrieved_documents": [],
-            "context": "Error: No course_id provided",
-            "needs_retrieval": False
-        }
+        return _retrieval_update(config, [], "Error: No course_id provided")
 
     logger.info(f"Query: '{query}'")
     logger.info(f"Course ID: '{course_id}'")
@@ -56,42 +91,22 @@ def retrieve_node(state: State) -> Dict[str, Any]:
 
     if "error" in retrieval_result:
         logger.error(f"Retrieval error: {retrieval_result['error']}")
-        return {
-            "retrieved_documents": [],
-            "context": f"Error retrieving documents: {retrieval_result['error']}",
-            "needs_retrieval": False
-        }
+        return _retrieval_update(config, [], f"Error retrieving documents: {retrieval_result['error']}")
 
     documents = retrieval_result.get("results", [])
     logger.info(f"Retrieved {len(documents)} documents")
 
     if not documents:
-        context = "No relevant course materials found for this query."
-    else:
-        context_parts = ["# Retrieved Course Materials\n"]
-
-        for i, doc in enumerate(documents, 1):
-            content = doc["content"]
-            metadata = doc.get("metadata", {})
-            score = doc.get("relevance_score", 0)
-
-            context_parts.append(f"## Document {i} (Relevance: {score:.2f})")
-
-            if metadata:
-                context_parts.append("**Metadata:**")
-                for key, value in metadata.items():
-                    if key != "course_id":
-                        context_parts.append(f"- {key}: {value}")
-
-            context_parts.append(f"\n**Content:**\n{content}\n")
-            context_parts.append("---\n")
-
-        context = "\n".join(context_parts)
+        return _retrieval_update(config, [], "No relevant course materials found for this query.")
 
-    logger.info(f"Context length: {len(context)} characters")
+    packed = pack_context(
+        merge_chunks(documents),
+        settings.course_context_max_tokens,
+        settings.course_context_metadata_fields,
+    )
+    logger.info(
+        f"Context: {packed.used_tokens}/{packed.available_tokens} tokens, "
+        f"{len(packed.documents)} passages from {len(documents)} chunks"
+    )
 
-    return {
-        "retrieved_documents": documents,
-        "context": context,
-        "needs_retrieval": False
-    }
+    return _retrieval_update(config, packed.documents, packed.text, packed.report())
@@ -9,12 +9,21 @@ class State(TypedDict):
     Attributes:
         messages: Conversation history
         course_id: ID of the course to filter documents by
-        retrieved_documents: Documents retrieved from vector store
-        context: Formatted context for LLM
+        retrieved_documents: Summaries (source, relevance score) of the retrieved documents
+        retrieval_ref: blob_store reference to the full documents and the formatted context
+        context_tokens: Token usage of the packed context ({"used", "available", "documents", "dropped", "truncated"})
         needs_retrieval: Flag to determine if retrieval is needed
+        cached_answer: Answer cache hit for the current question, if any
+        answer_cache_version: Answer cache partition version read before retrieval
+        history_summary: Running summary of the turns that no longer fit the
+                         prompt budget ({"covered": message count, "text"})
     """
     messages: Annotated[list, add_messages]
     course_id: str
     retrieved_documents: Optional[list]
-    context: Optional[str]
-    needs_retrieval: bool
\ No newline at end of file
+    retrieval_ref: Optional[dict]
+    context_tokens: Optional[dict]
+    needs_retrieval: bool
+    cached_answer: Optional[dict]
+    answer_cache_version: Optional[int]
+    history_summary: Optional[dict]
\ No newline at end of file
@@ -1,13 +1,18 @@
 import os
 from typing import Optional
 from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings
+from core.answer_cache import PartitionVersions, SemanticAnswerCache
+from core.embedding_cache import cached_openai_embeddings
+from core.hybrid_search import HybridSearch, SEARCH_TYPES
+from core.sparse import TurkishBM25
 from qdrant_client.models import Filter, FieldCondition, MatchValue
 import logging
 
+from settings import settings
+
 logger = logging.getLogger(__name__)
 
-embeddings = OpenAIEmbeddings(
+embeddings = cached_openai_embeddings(
     model="text-embedding-3-large",
 )
 
@@ -21,20 +26,50 @@ course_store = QdrantVectorStore.from_existing_collection(
     api_key=qdrant_api_key,
 )
 
+course_search = HybridSearch(
+    course_store,
+    TurkishBM25(),
+    sparse_vector_name=settings.sparse_vector_name,
+    prefetch_limit=settings.hybrid_prefetch_limit,
+    enabled=settings.hybrid_search,
+    oversampling=settings.quantization_oversampling,
+    rescore=settings.quantization_rescore,
+)
+
+# Answers keyed by course_id; invalidated by /embed when a course's documents
+# change, in every worker through the shared version counters
+answer_cache = SemanticAnswerCache(
+    threshold=settings.answer_cache_similarity,
+    max_entries=settings.answer_cache_max_entries,
+    ttl=settings.answer_cache_ttl,
+    versions=PartitionVersions(settings.answer_cache_versions_path),
+)
+
 
 def retrieve_course_documents(
     query: str,
     course_id: str,
     k: Optional[int] = 5,
-    score_threshold: Optional[float] = 0.1
+    score_threshold: Optional[float] = 0.1,
+    search_type: Optional[str] = None
 ) -> dict:
     """
     Retrieve relevant documents from vector store filtered by course_id.
+
+    With hybrid search the scores are RRF scores, which only rank results;
+    relevance_score is then reported relative to the best hit and
+    score_threshold is not applied.
+
+    search_type "mmr" returns a diverse top k (see HybridSearch.mmr_search);
+    None uses settings.course_search_type.
     """
     k = max(1, min(k, 20))
+    search_type = search_type or settings.course_search_type
+    if search_type not in SEARCH_TYPES:
+        search_type = "similarity"
 
     try:
-        logger.info(f"Searching course '{course_id}' for: '{query}' (top {k} results)")
+        logger.info(f"Searching course '{course_id}' for: '{query}' (top {k} {search_type} results)")
 
         course_filter = Filter(
             must=[
@@ -45,17 +80,25 @@ def retrieve_course_documents(
             ]
         )
 
-        results = course_store.similarity_search_with_score(
-            query=query,
-            k=k,
-            filter=course_filter
-        )
+        if search_type == "mmr":
+            results = course_search.mmr_search(
+                query,
+                k=k,
+                filter=course_filter,
+                fetch_k=settings.mmr_fetch_k,
+                lambda_mult=settings.mmr_lambda,
+            )
+        else:
+            results = course_search.search(query, k=k, filter=course_filter)
+        hybrid = course_search.available()
+        # MMR results are not in score order
+        best_score = max((score for _, score in results), default=0)
 
         formatted_results = []
         for doc, score in results:
-            similarity_score = 1 / (1 + score)
+            similarity_score = score / best_score if hybrid else 1 / (1 + score)
 
-            if similarity_score >= score_threshold:
+            if hybrid or similarity_score >= score_threshold:
                 formatted_results.append({
                     "content": doc.page_content,
                     "metadata": doc.metadata,
@@ -70,7 +113,8 @@ def retrieve_course_documents(
             "course_id": course_id,
             "num_results": len(formatted_results),
             "results": formatted_results,
-            "score_threshold": score_threshold
+            "score_threshold": score_threshold,
+            "search_type": search_type
         }
 
     except Exception as e:
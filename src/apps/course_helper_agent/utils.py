@@ -5,6 +5,8 @@ Utility functions for the Course Helper Agent.
 from typing import Dict, List, Optional, Any
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
 
+from core.tokens import count_tokens, truncate_to_tokens
+
 
 def create_initial_state(
     course_id: str,
@@ -29,8 +31,11 @@ def create_initial_state(
         "messages": messages,
         "course_id": course_id,
         "retrieved_documents": None,
-        "context": None,
-        "needs_retrieval": True
+        "retrieval_ref": None,
+        "context_tokens": None,
+        "needs_retrieval": True,
+        "cached_answer": None,
+        "answer_cache_version": None
     }
 
 
@@ -103,16 +108,15 @@ def extract_sources_from_documents(documents: List[Dict[str, Any]]) -> List[Dict
 
 def estimate_token_count(text: str) -> int:
     """
-    Rough estimation of token count for text.
+    Token count of text for the chat model's tokenizer.
 
     Args:
-        text: Text to estimate tokens for
+        text: Text to count tokens for
 
     Returns:
-        Estimated token count
+        Token count
     """
-    # Rough estimation: ~4 characters per token for English text
-    return len(text) // 4
+    return count_tokens(text)
 
 
 def should_retrieve(question: str, conversation_history: Optional[List[BaseMessage]] = None) -> bool:
@@ -176,21 +180,18 @@ def truncate_context(context: str, max_tokens: int = 4000) -> str:
     Returns:
         Truncated context
     """
-    estimated_tokens = estimate_token_count(context)
-
-    if estimated_tokens <= max_tokens:
+    if count_tokens(context) <= max_tokens:
         return context
 
-    # Truncate to approximate character count
-    max_chars = max_tokens * 4
-    truncated = context[:max_chars]
+    notice = "\n\n[Context truncated due to length...]"
+    truncated = truncate_to_tokens(context, max_tokens - count_tokens(notice))
 
     # Try to truncate at a sentence boundary
     last_period = truncated.rfind(".")
-    if last_period > max_chars * 0.8:  # Only if we don't lose too much
+    if last_period > len(truncated) * 0.8:  # Only if we don't lose too much
         truncated = truncated[:last_period + 1]
 
-    return truncated + "\n\n[Context truncated due to length...]"
+    return truncated + notice
 
 
 def create_error_response(error_message: str) -> Dict[str, Any]:
@@ -0,0 +1,339 @@
+"""
+Local first stage of the orchestrator router.
+
+Follow-up messages in a thread keep the agent that answered the previous
+turn unless a topic-shift check fires: the keyword rules or, without a
+keyword match, a confident centroid decision for the other route. Other
+messages go through two cheap classifiers before the routing LLM:
+
+1. Keyword rules derived from the decision criteria in
+   ORCHESTRATOR_SYSTEM_PROMPT (time expressions, "duyuru", "yönetmelik",
+   "şartlar", ...). They match on Turkish-casefolded text and decide only
+   when exactly one side matches.
+2. A nearest-centroid classifier over embeddings of example questions. The
+   example embeddings come from the persistent embedding cache and the query
+   embedding from the shared query LRU, which query_school_regulations
+   reuses when the message is routed to the regulations agent.
+
+Only when neither stage is confident enough does the router fall back to
+the LLM.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+ANNOUNCEMENT = "ANNOUNCEMENT"
+YONETMELIK = "YONETMELIK"
+
+# Patterns run against normalize_query() output, so they are lowercase with Turkish i/ı
+KEYWORD_RULES = {
+    ANNOUNCEMENT: [
+        # Zaman belirten ifadeler
+        r"\bson (duyuru|haber|gün|hafta|ay\b|paylaş|etkinli)", r"\ben son\b", r"\bbu hafta", r"\bgeçen hafta", r"\bbu ay\b",
+        r"\bbugün", r"\byarın", r"\bdün\b", r"\bgüncel", r"\byeni\b",
+        # Duyuru, haber, etkinlik
+        r"\bduyuru", r"\bhaber", r"\betkinli", r"\bseminer", r"\bkonferans",
+        # Sınav tarihleri, kayıt dönemleri, son tarihler
+        r"\bsınav (tarih|takvim|program)", r"\bkayıt (dönem|tarih)", r"\bson tarih",
+    ],
+    YONETMELIK: [
+        # Kural, yönetmelik, prosedür
+        r"\bkural", r"\byönetmeli", r"\byönerge", r"\bprosedür", r"\bmevzuat",
+        r"\bmadde(si|sine|de)?\b", r"\bpolitika", r"\bresmi belge",
+        # Nasıl yapılır, şartlar, gereklilikler
+        r"\bnasıl yapıl", r"\bşart(lar|ları|ı)?\b", r"\bgereklilik", r"\bkoşul",
+    ],
+}
+
+# Openers that mark a message as a follow-up to the previous answer. Only the
+# start of the message counts: "bu", "şu", "o" occur in most Turkish sentences.
+FOLLOW_UP_PATTERN = re.compile(
+    r"^(peki|ya|yani|tamam|teşekkür|sağ ol|bir de|ayrıca|hani"
+    r"|bu|şu|o|bunun|şunun|onun|bunu|onu|buna|ona|bunlar|onlar"
+    r"|ilk|birinci|ikinci|üçüncü|dördüncü|beşinci|sonuncu|diğer|öteki|başka|önceki"
+    r"|daha fazla|detay|ayrıntı|devam)\b"
+)
+
+# Example questions per route for the nearest-centroid stage
+CENTROID_EXAMPLES = {
+    ANNOUNCEMENT: [
+        "Bölümden yeni bir duyuru var mı?",
+        "Final sınavları ne zaman başlıyor?",
+        "Bu hafta hangi etkinlikler var?",
+        "Ders kayıtları hangi tarihte açılıyor?",
+        "Staj başvuruları için son gün ne zaman?",
+        "Bölüm web sitesinde son paylaşılan haberler neler?",
+        "Yarın ders var mı, iptal edildi mi?",
+        "Mezuniyet töreni ne zaman yapılacak?",
+    ],
+    YONETMELIK: [
+        "Mazeret sınavına girme şartları nelerdir?",
+        "Ders tekrarı nasıl yapılır?",
+        "Devamsızlık sınırı kaç saat?",
+        "Yatay geçiş için gerekli koşullar nelerdir?",
+        "Çift anadal programına kimler başvurabilir?",
+        "Not ortalaması nasıl hesaplanır?",
+        "Kayıt dondurma hangi durumlarda mümkündür?",
+        "Azami öğrenim süresini aşan öğrenciye ne olur?",
+    ],
+}
+
+
+@dataclass
+class RouteDecision:
+    label: str
+    stage: str
+    confidence: float
+    detail: str
+
+
+class FastRouter:
+    """
+    Keyword and nearest-centroid router run in front of the routing LLM.
+
+    Follow-up messages in a thread that already has an agent keep that agent
+    ("sticky" stage) unless topic_shift() fires.
+
+    Args:
+        embeddings: Embedding model used for the centroid stage, or None to
+                    use keyword rules only
+        centroid_margin: Minimum cosine similarity gap between the best and
+                         the second best centroid for a centroid decision
+        sticky: Reuse the previous route for follow-up messages
+        follow_up_max_words: Longer messages that do not open with a follow-up
+                             marker are treated as new questions and routed again
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings],
+        centroid_margin: float,
+        sticky: bool = True,
+        follow_up_max_words: int = 12,
+    ):
+        self.embeddings = embeddings
+        self.centroid_margin = centroid_margin
+        self.sticky = sticky
+        self.follow_up_max_words = follow_up_max_words
+
+        self._rules = {
+            label: [re.compile(pattern) for pattern in patterns]
+            for label, patterns in KEYWORD_RULES.items()
+        }
+        self._labels = list(CENTROID_EXAMPLES)
+        self._centroids: Optional[np.ndarray] = None
+
+        self._lock = threading.Lock()
+        self._stats = {stage: {"count": 0, "total_ms": 0.0} for stage in ("sticky", "keyword", "centroid", "llm")}
+        self._topic_shifts = 0
+
+    def classify_keywords(self, text: str) -> Optional[RouteDecision]:
+        """Decide from keyword rules when exactly one route has matches."""
+        normalized = normalize_query(text)
+        matches = {}
+        for label, patterns in self._rules.items():
+            found = [match.group(0) for match in (pattern.search(normalized) for pattern in patterns) if match]
+            if found:
+                matches[label] = found
+
+        if len(matches) != 1:
+            return None
+
+        label, found = next(iter(matches.items()))
+        return RouteDecision(label, "keyword", 1.0, ", ".join(found))
+
+    def _shift_reason(
+        self,
+        text: str,
+        previous_label: str,
+        keywords: Optional[RouteDecision],
+        centroid: Optional[RouteDecision],
+    ) -> Optional[str]:
+        if keywords is not None:
+            if keywords.label != previous_label:
+                return f"keywords point to {keywords.label} ({keywords.detail})"
+            return None
+
+        if centroid is not None and centroid.label != previous_label:
+            return f"centroid points to {centroid.label} ({centroid.detail})"
+
+        normalized = normalize_query(text)
+        if len(normalized.split()) > self.follow_up_max_words and not FOLLOW_UP_PATTERN.search(normalized):
+            return "long message without follow-up marker"
+        return None
+
+    def topic_shift(self, text: str, previous_label: str) -> Optional[str]:
+        """
+        Check whether a message in an ongoing thread starts a new topic.
+
+        Keyword rules decide first. Without a keyword match the centroid
+        classifier is the shift detector: a confident decision for the other
+        route is a shift, while an agreeing or unconfident one keeps the
+        thread's route unless the message is long and does not open with a
+        follow-up marker.
+
+        Returns:
+            The reason for the shift, or None if the message is a follow-up
+        """
+        keywords = self.classify_keywords(text)
+        centroid = None
+        if keywords is None:
+            try:
+                centroid = self.classify_centroid(text)
+            except Exception as e:
+                logger.warning(f"Centroid topic-shift check failed: {e}")
+        return self._shift_reason(text, previous_label, keywords, centroid)
+
+    async def atopic_shift(self, text: str, previous_label: str) -> Optional[str]:
+        """Async variant of topic_shift."""
+        keywords = self.classify_keywords(text)
+        centroid = None
+        if keywords is None:
+            try:
+                centroid = await self.aclassify_centroid(text)
+            except Exception as e:
+                logger.warning(f"Centroid topic-shift check failed: {e}")
+        return self._shift_reason(text, previous_label, keywords, centroid)
+
+    def _sticky_decision(self, previous_label: str, shift: Optional[str], start: float) -> Optional[RouteDecision]:
+        if shift is not None:
+            logger.info(f"Topic shift from {previous_label}: {shift}")
+            with self._lock:
+                self._topic_shifts += 1
+            return None
+
+        decision = RouteDecision(previous_label, "sticky", 1.0, "follow-up")
+        self.record(decision.stage, time.perf_counter() - start)
+        return decision
+
+    @staticmethod
+    def _build_centroids(labels: list[str], vectors: list[list[float]]) -> np.ndarray:
+        data = np.asarray(vectors, dtype=np.float32)
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+
+        centroids = []
+        start = 0
+        for label in labels:
+            count = len(CENTROID_EXAMPLES[label])
+            centroid = data[start:start + count].mean(axis=0)
+            centroids.append(centroid / np.linalg.norm(centroid))
+            start += count
+        return np.stack(centroids)
+
+    def _examples(self) -> list[str]:
+        return [example for label in self._labels for example in CENTROID_EXAMPLES[label]]
+
+    def _centroid_decision(self, vector: list[float]) -> Optional[RouteDecision]:
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query)
+
+        similarities = self._centroids @ query
+        order = np.argsort(similarities)[::-1]
+        margin = float(similarities[order[0]] - similarities[order[1]])
+        if margin < self.centroid_margin:
+            return None
+
+        label = self._labels[int(order[0])]
+        return RouteDecision(label, "centroid", margin, f"margin {margin:.3f}")
+
+    def classify_centroid(self, text: str) -> Optional[RouteDecision]:
+        if self.embeddings is None:
+            return None
+
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._centroids = self._build_centroids(self._labels, self.embeddings.embed_documents(self._examples()))
+
+        return self._centroid_decision(self.embeddings.embed_query(text))
+
+    async def aclassify_centroid(self, text: str) -> Optional[RouteDecision]:
+        if self.embeddings is None:
+            return None
+
+        if self._centroids is None:
+            # Concurrent first calls may both build; the example embeddings are cached
+            self._centroids = self._build_centroids(self._labels, await self.embeddings.aembed_documents(self._examples()))
+
+        return self._centroid_decision(await self.embeddings.aembed_query(text))
+
+    def route(self, text: str, previous_label: Optional[str] = None) -> Optional[RouteDecision]:
+        """
+        Run the local stages in order.
+
+        Args:
+            text: User message
+            previous_label: Route of the previous turn in the thread, if any
+
+        Returns:
+            The first confident decision, or None to fall back to the LLM
+        """
+        start = time.perf_counter()
+        if self.sticky and previous_label is not None:
+            decision = self._sticky_decision(previous_label, self.topic_shift(text, previous_label), start)
+            if decision is not None:
+                return decision
+
+        decision = self.classify_keywords(text)
+
+        if decision is None:
+            try:
+                decision = self.classify_centroid(text)
+            except Exception as e:
+                logger.warning(f"Centroid routing failed: {e}")
+
+        if decision is not None:
+            self.record(decision.stage, time.perf_counter() - start)
+        return decision
+
+    async def aroute(self, text: str, previous_label: Optional[str] = None) -> Optional[RouteDecision]:
+        """Async variant of route."""
+        start = time.perf_counter()
+        if self.sticky and previous_label is not None:
+            decision = self._sticky_decision(previous_label, await self.atopic_shift(text, previous_label), start)
+            if decision is not None:
+                return decision
+
+        decision = self.classify_keywords(text)
+
+        if decision is None:
+            try:
+                decision = await self.aclassify_centroid(text)
+            except Exception as e:
+                logger.warning(f"Centroid routing failed: {e}")
+
+        if decision is not None:
+            self.record(decision.stage, time.perf_counter() - start)
+        return decision
+
+    def record(self, stage: str, seconds: float):
+        """Count a routing decision made by `stage` and its latency."""
+        with self._lock:
+            self._stats[stage]["count"] += 1
+            self._stats[stage]["total_ms"] += seconds * 1000
+
+    def stats(self) -> dict:
+        """Decision count and average latency per stage, plus sticky routing counters."""
+        with self._lock:
+            stats = {
+                stage: {
+                    "count": values["count"],
+                    "avg_ms": round(values["total_ms"] / values["count"], 2) if values["count"] else 0.0,
+                }
+                for stage, values in self._stats.items()
+            }
+            stats["routing_skipped"] = self._stats["sticky"]["count"]
+            stats["topic_shifts"] = self._topic_shifts
+            return stats
@@ -1,10 +1,12 @@
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.graph import StateGraph, START, END
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from typing import Literal, TypedDict, Annotated
 from langgraph.graph import add_messages
 from enum import Enum
 import logging
+import time
 from langgraph.config import get_stream_writer
 
 logging.basicConfig(level=logging.INFO)
@@ -12,13 +14,18 @@ logger = logging.getLogger(__name__)
 
 from apps.school_web_site_agent.scrapper_agent import agent as announcement_agent
 from apps.school_web_site_agent.yonetmelik_agent import agent as yonetmelik_agent
+from apps.school_web_site_agent.fast_router import FastRouter
+from core.checkpointer import create_checkpointer
+from core.embedding_cache import cached_openai_embeddings
 from core.llm import llm
+from settings import settings
 
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
     next_agent: str
     routing_reason: str
+    routing_stage: str
     current_agent: str
 
 
@@ -60,66 +67,143 @@ Sadece "ANNOUNCEMENT" veya "YONETMELIK" kelimelerinden birini döndür, başka b
 """
 
 
-def router_node(state: State, llm) -> State:
+def _last_user_message(state: State) -> str | None:
+    """Return the content of the most recent HumanMessage in the state."""
+    for msg in reversed(state["messages"]):
+        if isinstance(msg, HumanMessage):
+            return msg.content
+    return None
+
+
+def _previous_route(state: State) -> str | None:
+    """
+    Route label of the agent that answered the previous turn, or None on the
+    first turn of a thread.
+    """
+    current_agent = state.get("current_agent")
+    if not current_agent or not any(isinstance(msg, AIMessage) for msg in state["messages"]):
+        return None
+    return "YONETMELIK" if current_agent == AgentType.YONETMELIK.value else "ANNOUNCEMENT"
+
+
+def _routing_messages(last_user_message: str) -> list:
+    return [
+        SystemMessage(content=ORCHESTRATOR_SYSTEM_PROMPT),
+        HumanMessage(content=last_user_message)
+    ]
+
+
+def _apply_routing_decision(state: State, last_user_message: str, decision: str, stage: str = "llm") -> State:
+    """
+    Map the raw decision to an agent, store it in state together with the
+    stage that made it and stream the routing metadata.
+    """
+    decision = decision.strip().upper()
+
+    if "YONETMELIK" in decision:
+        agent = AgentType.YONETMELIK.value
+    elif "ANNOUNCEMENT" in decision:
+        agent = AgentType.ANNOUNCEMENT.value
+    else:
+        logger.warning(f"Unclear routing decision: {decision}, defaulting to announcement")
+        agent = AgentType.ANNOUNCEMENT.value
+        decision = f"UNCLEAR: {decision} -> DEFAULT: ANNOUNCEMENT"
+
+    state["next_agent"] = agent
+    state["routing_reason"] = decision
+    state["routing_stage"] = stage
+    state["current_agent"] = agent
+
+    # Optional: Stream metadata about routing without streaming the actual response
+    writer = get_stream_writer()
+    writer({"agent": agent, "routing_reason": decision, "routing_stage": stage})
+
+    logger.info(f"🔀 Routing to {agent.upper()} ({stage}) for query: '{last_user_message[:50]}...'")
+
+    return state
+
+
+def _apply_routing_error(state: State, e: Exception) -> State:
+    logger.error(f"Error during routing: {e}", exc_info=True)
+    state["next_agent"] = AgentType.ANNOUNCEMENT.value
+    state["routing_reason"] = f"ERROR: {str(e)}"
+    state["routing_stage"] = "error"
+    state["current_agent"] = AgentType.ANNOUNCEMENT.value
+    logger.error(f"❌ Routing error, defaulting to announcement agent: {e}")
+    return state
+
+
+def _apply_missing_user_message(state: State) -> State:
+    logger.warning("No user message found, defaulting to announcement agent")
+    state["next_agent"] = AgentType.ANNOUNCEMENT.value
+    state["routing_reason"] = "No user message found"
+    return state
+
+
+def _apply_fast_decision(state: State, last_user_message: str, fast) -> State:
+    return _apply_routing_decision(
+        state,
+        last_user_message,
+        f"{fast.label} ({fast.stage}: {fast.detail})",
+        stage=fast.stage
+    )
+
+
+def router_node(state: State, llm, fast_router: FastRouter | None = None) -> State:
     """
     Router node that determines which agent should handle the query.
     Stores the decision in state for transparency and debugging.
 
+    The local fast_router is tried first: follow-ups keep the previous agent
+    unless the topic shifts, other messages go through keyword rules and
+    embedding centroids. The LLM is only called when it is not confident.
+
     This node does NOT add messages to the state to prevent streaming output.
     """
-    messages = state["messages"]
-
-    # Find the last user message
-    last_user_message = None
-    for msg in reversed(messages):
-        if isinstance(msg, HumanMessage):
-            last_user_message = msg.content
-            break
+    last_user_message = _last_user_message(state)
 
     if not last_user_message:
-        logger.warning("No user message found, defaulting to announcement agent")
-        state["next_agent"] = AgentType.ANNOUNCEMENT.value
-        state["routing_reason"] = "No user message found"
-        return state
+        return _apply_missing_user_message(state)
 
     try:
-        routing_messages = [
-            SystemMessage(content=ORCHESTRATOR_SYSTEM_PROMPT),
-            HumanMessage(content=last_user_message)
-        ]
+        fast = fast_router.route(last_user_message, _previous_route(state)) if fast_router else None
+        if fast is not None:
+            return _apply_fast_decision(state, last_user_message, fast)
 
         # Call LLM but don't add its response to the state messages
-        response = llm.invoke(routing_messages)
-        decision = response.content.strip().upper()
+        start = time.perf_counter()
+        response = llm.invoke(_routing_messages(last_user_message))
+        if fast_router:
+            fast_router.record("llm", time.perf_counter() - start)
+        return _apply_routing_decision(state, last_user_message, response.content)
+
+    except Exception as e:
+        return _apply_routing_error(state, e)
 
-        if "YONETMELIK" in decision:
-            agent = AgentType.YONETMELIK.value
-        elif "ANNOUNCEMENT" in decision:
-            agent = AgentType.ANNOUNCEMENT.value
-        else:
-            logger.warning(f"Unclear routing decision: {decision}, defaulting to announcement")
-            agent = AgentType.ANNOUNCEMENT.value
-            decision = f"UNCLEAR: {decision} -> DEFAULT: ANNOUNCEMENT"
 
-        state["next_agent"] = agent
-        state["routing_reason"] = decision
-        state["current_agent"] = agent
+async def arouter_node(state: State, llm, fast_router: FastRouter | None = None) -> State:
+    """
+    Async variant of router_node used when the graph is driven through
+    astream/ainvoke, so the routing LLM call does not block the event loop.
+    """
+    last_user_message = _last_user_message(state)
 
-        # Optional: Stream metadata about routing without streaming the actual response
-        writer = get_stream_writer()
-        writer({"agent": agent, "routing_reason": decision})
+    if not last_user_message:
+        return _apply_missing_user_message(state)
 
-        logger.info(f"🔀 Routing to {agent.upper()} for query: '{last_user_message[:50]}...'")
+    try:
+        fast = await fast_router.aroute(last_user_message, _previous_route(state)) if fast_router else None
+        if fast is not None:
+            return _apply_fast_decision(state, last_user_message, fast)
 
-    except Exception as e:
-        logger.error(f"Error during routing: {e}", exc_info=True)
-        state["next_agent"] = AgentType.ANNOUNCEMENT.value
-        state["routing_reason"] = f"ERROR: {str(e)}"
-        state["current_agent"] = AgentType.ANNOUNCEMENT.value
-        logger.error(f"❌ Routing error, defaulting to announcement agent: {e}")
+        start = time.perf_counter()
+        response = await llm.ainvoke(_routing_messages(last_user_message))
+        if fast_router:
+            fast_router.record("llm", time.perf_counter() - start)
+        return _apply_routing_decision(state, last_user_message, response.content)
 
-    # Return state without adding any AI messages
-    return state
+    except Exception as e:
+        return _apply_routing_error(state, e)
 
 
 def route_to_agent(state: State) -> AgentType:
@@ -130,13 +214,30 @@ def route_to_agent(state: State) -> AgentType:
     return AgentType(next_agent)
 
 
-def create_orchestrator_graph(llm, announcement_agent, yonetmelik_agent):
+def create_orchestrator_graph(
+    llm,
+    announcement_agent,
+    yonetmelik_agent,
+    fast_router: FastRouter | None = None,
+    checkpointer: BaseCheckpointSaver | None = None
+):
     """
     Create the orchestrator graph that routes between specialized agents.
+
+    Args:
+        fast_router: Optional local router tried before the routing LLM
+        checkpointer: Checkpointer to compile with; defaults to the backend
+                      selected by settings.checkpoint_backend
     """
     workflow = StateGraph(State)
 
-    workflow.add_node("router", lambda state: router_node(state, llm))
+    def route(state: State) -> State:
+        return router_node(state, llm, fast_router)
+
+    async def aroute(state: State) -> State:
+        return await arouter_node(state, llm, fast_router)
+
+    workflow.add_node("router", RunnableLambda(route, afunc=aroute, name="router"))
     workflow.add_node(AgentType.ANNOUNCEMENT.value, announcement_agent)
     workflow.add_node(AgentType.YONETMELIK.value, yonetmelik_agent)
 
@@ -154,7 +255,8 @@ def create_orchestrator_graph(llm, announcement_agent, yonetmelik_agent):
     workflow.add_edge(AgentType.ANNOUNCEMENT.value, END)
     workflow.add_edge(AgentType.YONETMELIK.value, END)
 
-    checkpointer = InMemorySaver()
+    if checkpointer is None:
+        checkpointer = create_checkpointer("orchestrator")
     graph = workflow.compile(checkpointer=checkpointer)
 
     logger.info("Orchestrator graph compiled successfully")
@@ -162,4 +264,11 @@ def create_orchestrator_graph(llm, announcement_agent, yonetmelik_agent):
     return graph
 
 
-orchestrator = create_orchestrator_graph(llm, announcement_agent, yonetmelik_agent)
\ No newline at end of file
+fast_router = FastRouter(
+    embeddings=cached_openai_embeddings(model="text-embedding-3-large") if settings.router_centroid_enabled else None,
+    centroid_margin=settings.router_centroid_margin,
+    sticky=settings.router_sticky,
+    follow_up_max_words=settings.router_follow_up_max_words,
+) if settings.router_fast_path else None
+
+orchestrator = create_orchestrator_graph(llm, announcement_agent, yonetmelik_agent, fast_router)
\ No newline at end of file
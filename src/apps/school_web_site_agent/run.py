@@ -1,6 +1,12 @@
-from apps.school_web_site_agent.scrapper_agent import agent
+from langgraph.checkpoint.memory import InMemorySaver
+
+from apps.school_web_site_agent.scrapper_agent import agent as subagent
 from apps.school_web_site_agent.context import Context
 
+# The subagent is compiled without a checkpointer (the orchestrator stores its
+# turns); recompile it with one so this script keeps memory per thread_id
+agent = subagent.builder.compile(checkpointer=InMemorySaver())
+
 config = {"configurable": {"thread_id": "12"}}
 
 response = agent.invoke(
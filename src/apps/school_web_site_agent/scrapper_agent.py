@@ -1,10 +1,10 @@
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain.agents import create_agent
 
-from apps.school_web_site_agent.state import State
+from core.history import ToolHistoryCompaction
 from core.llm import llm
 from apps.school_web_site_agent.tools import scrape_announcements, scrape_announcement, get_document_from_url
 from apps.school_web_site_agent.context import Context
+from settings import settings
 
 SYSTEM_PROMPT = """
 Sen Üniversite Duyurularına erişebilen bir asistansın. Kullanıcılara duyurular hakkında bilgi vermek için tasarlandın.
@@ -26,13 +26,14 @@ Görevlerin:
 - "Sınav takvimi var mı?" -> scrape_announcements ile ara, ilgili duyuruyu bul, detaylarını al
 """
 
-checkpointer = InMemorySaver()
-
 agent = create_agent(
     model=llm,
     system_prompt=SYSTEM_PROMPT,
     tools=[scrape_announcements, scrape_announcement, get_document_from_url],
-    state_schema=State,
     context_schema=Context,
-    checkpointer=checkpointer
+    middleware=[ToolHistoryCompaction(settings.agent_history_max_tokens, settings.agent_tool_digest_chars)],
+    # Runs as a subgraph of the orchestrator, whose checkpoint is the single
+    # store of the thread's messages; the agent writes no checkpoints of its own
+    # (see src/scripts/measure_checkpoint_bytes.py).
+    checkpointer=False
 )
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+HTTP-first scraping of the department website.
+
+Most department pages are server-rendered, so the announcement list and the
+announcement detail pages can be read with a plain GET and an HTML parser.
+The parse functions return None when the selectors the scrapers rely on are
+missing, which tells the caller to fall back to the Playwright browser pool.
+"""
+
+import logging
+import re
+from typing import Optional
+
+import requests
+import urllib3
+from bs4 import BeautifulSoup
+
+from core.latency import LatencyBudget
+
+logger = logging.getLogger(__name__)
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+HEADERS = {
+    "User-Agent": 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    "Accept-Language": "tr-TR,tr;q=0.9",
+}
+
+CONTENT_SELECTORS = [
+    ".info > p",
+    ".item .info p",
+    ".blog-area .info p"
+]
+
+LINK_SELECTORS = [
+    ".info p a",
+    ".item .info a[href*='pdf']",
+    ".blog-area .info a"
+]
+
+# Keep-alive connections to the department sites are reused across calls
+session = requests.Session()
+session.headers.update(HEADERS)
+
+
+def resolve_link(href: str, url: str) -> str:
+    """Turn a relative link found on the page at `url` into an absolute URL."""
+    if href.startswith('../'):
+        return url.rsplit('/', 2)[0] + '/' + href.replace('../', '')
+    elif not href.startswith('http'):
+        base_url = '/'.join(url.split('/')[:3])
+        return base_url + '/' + href.lstrip('/')
+    return href
+
+
+def fetch_html(url: str, budget: LatencyBudget, headers: Optional[dict] = None) -> Optional[requests.Response]:
+    """
+    GET a page within the remaining latency budget.
+
+    Args:
+        url: Page URL
+        budget: Latency budget of the calling tool
+        headers: Extra request headers, e.g. If-None-Match for revalidation
+
+    Returns:
+        The 200 or 304 response, or None if the request failed
+    """
+    try:
+        with budget.step("http_fetch"):
+            response = session.get(url, headers=headers, verify=False, timeout=max(0.5, budget.remaining()))
+            if response.status_code != 304:
+                response.raise_for_status()
+        return response
+    except requests.RequestException as e:
+        logger.warning(f"HTTP fetch failed for {url}: {e}")
+        return None
+
+
+def parse_announcements(html: bytes, url: str) -> Optional[list]:
+    """
+    Parse the announcement list from server-rendered HTML.
+
+    Args:
+        html: Body of {url}/Duyurular
+        url: Department base URL used to build absolute announcement links
+
+    Returns:
+        List of announcements (title, url, date), or None if the list
+        container or its items are missing from the HTML
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    items = soup.select('.trending-courses-items .item')
+    if not items:
+        return None
+
+    announcements = []
+
+    for idx, item in enumerate(items):
+        title_element = item.select_one('h5 a')
+        if not title_element:
+            logger.debug(f"Skipping item {idx}: no title element found")
+            continue
+
+        title = title_element.get_text(strip=True)
+        relative_link = title_element.get('href')
+
+        if not relative_link:
+            logger.debug(f"Skipping item {idx}: no link found")
+            continue
+
+        meta_element = item.select_one('.meta')
+
+        if not meta_element:
+            logger.debug(f"Skipping item {idx}: no meta element found")
+            continue
+
+        date_match = re.search(r'(\d{2}\.\d{2}\.\d{4})', meta_element.get_text(" "))
+
+        announcements.append({
+            'title': title,
+            'url': f"{url}/{relative_link}",
+            'date': date_match.group(1) if date_match else "N/A",
+        })
+
+    return announcements if announcements else None
+
+
+def parse_announcement(html: bytes, url: str) -> Optional[dict]:
+    """
+    Parse a single announcement page from server-rendered HTML.
+
+    Args:
+        html: Body of the announcement page
+        url: Announcement URL, used to resolve relative links
+
+    Returns:
+        Dictionary with title, date, content paragraphs and links, or None
+        if the title or date selectors are missing from the HTML
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    info = soup.select_one('.blog-area .info')
+    if info is None:
+        return None
+
+    title_element = info.select_one('h3')
+    date_elements = info.select('.meta li')
+    if title_element is None or not date_elements:
+        return None
+
+    content_text = []
+    for selector in CONTENT_SELECTORS:
+        for paragraph in soup.select(selector):
+            text = paragraph.get_text(" ", strip=True)
+            if text:
+                content_text.append(text)
+        if content_text:
+            break
+
+    links = []
+    for selector in LINK_SELECTORS:
+        for link in soup.select(selector):
+            href = link.get('href')
+            if href and 'addtoany' not in href.lower():
+                links.append({
+                    'text': link.get_text(strip=True),
+                    'href': resolve_link(href, url)
+                })
+        if links:
+            break
+
+    return {
+        "title": title_element.get_text(strip=True),
+        "date": date_elements[0].get_text(strip=True),
+        "content": content_text,
+        "links": links
+    }
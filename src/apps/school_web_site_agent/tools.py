@@ -1,19 +1,53 @@
-import os
-
 from langchain.tools import tool, ToolRuntime
-from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.tools import StructuredTool
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from playwright.sync_api import sync_playwright
+from playwright.async_api import Page
 from apps.school_web_site_agent.context import Context
-import time
+from apps.school_web_site_agent.static_scraper import (
+    CONTENT_SELECTORS,
+    LINK_SELECTORS,
+    fetch_html,
+    parse_announcement,
+    parse_announcements,
+    resolve_link,
+    session,
+)
+import asyncio
+import logging
 import re
 from datetime import datetime, timedelta
-from typing import Optional, Literal
-from core.vector_store import store
+from typing import Any, Optional, Literal
+from core.vector_store import search as regulation_search
+from core.hybrid_search import SEARCH_TYPES
+from core.browser_pool import browser_pool
+from core.latency import LatencyBudget
+from core.cache import TTLCache
+from core.pdf_cache import PdfChunkCache
+from core.pdf_loader import load_pdf
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Metadata of a regulation chunk passed to the model
+REGULATION_CITATION_FIELDS = ("title", "source", "source_url", "page", "page_label")
+
+# Parsed announcement lists and pages, keyed by page URL
+page_cache = TTLCache(
+    ttl=settings.announcement_cache_ttl,
+    max_bytes=settings.announcement_cache_max_bytes,
+)
+
+# Split PDF attachments on disk, keyed by URL and content hash
+pdf_cache = PdfChunkCache(
+    directory=settings.pdf_cache_dir,
+    variant="tiktoken-250-0",
+    max_bytes=settings.pdf_cache_max_bytes,
+    fresh_for=settings.pdf_cache_fresh_for,
+)
 
 
 @tool
-def get_document_from_url(runtime: ToolRuntime[Context],url: str):
+def get_document_from_url(url: str):
     """
     Download and extract text content from a PDF document at the given URL.
 
@@ -26,9 +60,10 @@ def get_document_from_url(runtime: ToolRuntime[Context],url: str):
                    ending in .pdf or pointing to a PDF resource.
 
     Returns:
-        list: A list of document chunks/splits, each containing:
-            - page_content: The text content of the chunk
-            - metadata: Information about the source document
+        dict: A dictionary containing:
+            - url (str): The document URL
+            - pages (int): Number of pages with text
+            - content (str): The document text, page by page ("[Sayfa N]" headers)
 
     Example usage:
         - Extract exam schedule from a PDF announcement
@@ -38,36 +73,254 @@ def get_document_from_url(runtime: ToolRuntime[Context],url: str):
     Note: This tool bypasses SSL verification for institutional websites
           that may have certificate issues.
     """
-    import tempfile
-    import requests
-    import urllib3
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    doc_splits = _load_pdf_chunks(url.replace("/Duyurular", "/"))
 
-    response = requests.get(url.replace("/Duyurular", "/"), verify=False, timeout=30)
-    response.raise_for_status()
+    return _document_text(url, doc_splits)
+
+
+def _document_text(url: str, doc_splits: list) -> dict:
+    """Text of a split PDF for the model, page by page, without the per-chunk metadata."""
+    pages: dict = {}
+    for doc in doc_splits:
+        pages.setdefault(doc.metadata.get("page"), []).append(doc.page_content)
+
+    content = "\n\n".join(
+        (f"[Sayfa {page + 1}]\n" if isinstance(page, int) else "") + "\n".join(texts)
+        for page, texts in pages.items()
+    )
+
+    return {"url": url, "pages": len(pages), "content": content}
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-        tmp_file.write(response.content)
-        tmp_path = tmp_file.name
 
-    loader = PyPDFLoader(tmp_path)
-    docs = loader.load()
+def _split_pdf(content: bytes, url: str) -> list:
+    docs = load_pdf(content, source=url)
 
     text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
         chunk_size=250, chunk_overlap=0
     )
 
-    doc_splits = text_splitter.split_documents(docs)
+    return text_splitter.split_documents(docs)
 
-    os.unlink(tmp_path)
 
-    runtime.state["related_announcement_doc"] = doc_splits
+def _load_pdf_chunks(url: str) -> list:
+    """
+    Return the split chunks of the PDF at url through pdf_cache.
 
-    return doc_splits
+    A recently checked URL is served from disk without network access.
+    Older records are revalidated with a conditional GET (ETag /
+    Last-Modified); a changed body whose hash is already cached reuses the
+    stored chunks instead of being parsed again.
+    """
+    record = pdf_cache.lookup(url)
+    headers = None
+
+    if record is not None:
+        if pdf_cache.is_fresh(record):
+            chunks = pdf_cache.load_chunks(record["content_hash"])
+            if chunks is not None:
+                pdf_cache.record("hits")
+                return chunks
+
+        headers = {}
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+
+    response = session.get(url, headers=headers, verify=False, timeout=30)
+
+    if response.status_code == 304 and record is not None:
+        chunks = pdf_cache.load_chunks(record["content_hash"])
+        if chunks is not None:
+            pdf_cache.record("revalidated")
+            pdf_cache.remember(url, record["content_hash"], record.get("etag"), record.get("last_modified"))
+            return chunks
+        # Chunks were evicted, fetch the full body again
+        response = session.get(url, verify=False, timeout=30)
 
+    response.raise_for_status()
 
-@tool
-def scrape_announcement(runtime: ToolRuntime[Context],url: str):
+    content_hash = pdf_cache.content_hash(response.content)
+    chunks = pdf_cache.load_chunks(content_hash)
+
+    if chunks is not None:
+        pdf_cache.record("content_hits")
+    else:
+        pdf_cache.record("misses")
+        chunks = _split_pdf(response.content, url)
+        pdf_cache.store_chunks(content_hash, chunks)
+
+    pdf_cache.remember(url, content_hash, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    return chunks
+
+
+def _load_cached(page_url: str, budget: LatencyBudget, parse, scrape) -> tuple[Any, str]:
+    """
+    Load a parsed page through page_cache.
+
+    Concurrent misses for the same URL wait for a single fetch. A stale
+    entry with validators is revalidated with a conditional GET, a 304
+    only extends its TTL; if the request fails the stale entry is served
+    instead of starting the browser.
+
+    Args:
+        page_url: Cache key and URL to fetch
+        budget: Latency budget of the calling tool
+        parse: Parses static HTML, returning None when selectors are missing
+        scrape: Browser pool job used when static parsing is not possible
+
+    Returns:
+        Tuple of the parsed value and its source (cache, revalidated, stale, http, browser)
+    """
+    entry = page_cache.lookup(page_url)
+    if entry is not None and entry.fresh:
+        return entry.value, "cache"
+
+    with budget.step("cache_wait"):
+        page_cache.acquire_key(page_url)
+
+    try:
+        # Another caller may have refreshed the entry while we waited
+        entry = page_cache.lookup(page_url, count=False)
+        if entry is not None and entry.fresh:
+            page_cache.record_coalesced()
+            return entry.value, "cache"
+
+        headers = entry.conditional_headers() if entry is not None else None
+        response = fetch_html(page_url, budget, headers=headers)
+
+        if response is not None and response.status_code == 304 and entry is not None:
+            page_cache.refresh(page_url)
+            return entry.value, "revalidated"
+
+        if response is None and entry is not None:
+            logger.warning(f"Revalidation of {page_url} failed, serving the expired entry")
+            page_cache.record_stale()
+            return entry.value, "stale"
+
+        if response is not None:
+            with budget.step("parse"):
+                value = parse(response.content)
+            if value is not None:
+                page_cache.set(
+                    page_url,
+                    value,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+                return value, "http"
+            logger.info(f"Expected selectors missing in static HTML of {page_url}, falling back to browser")
+
+        value = browser_pool.run(scrape, acquire_timeout=budget.remaining())
+        page_cache.set(page_url, value)
+        return value, "browser"
+
+    finally:
+        page_cache.release_key(page_url)
+
+
+async def _scrape_announcement_page(page: Page, url: str, budget: LatencyBudget) -> dict:
+    """
+    Extract title, date, content paragraphs and links from an announcement page.
+
+    Readiness is driven by the title and date selectors the scraper reads;
+    every wait takes its timeout from the call's latency budget.
+    """
+    budget.mark("acquire_page")
+
+    print(f"Navigating to {url}...")
+    with budget.step("goto"):
+        await page.goto(url, timeout=budget.remaining_ms(), wait_until='domcontentloaded')
+
+    with budget.step("wait_title"):
+        await page.wait_for_selector('.blog-area .info h3', timeout=budget.remaining_ms(), state='visible')
+
+    with budget.step("wait_meta"):
+        await page.wait_for_selector('.blog-area .info .meta li', timeout=budget.remaining_ms(), state='attached')
+
+    info = page.locator(".blog-area .info").first
+
+    title = (await info.locator("h3").inner_text()).strip()
+    print(f"Found title: {title}\n")
+
+    date = (await info.locator(".meta li").nth(0).inner_text()).strip()
+    print(f"Found date: {date}\n")
+
+    with budget.step("extract"):
+        content_text, links = await _extract_announcement_body(page, url)
+
+    return {
+        "title": title,
+        "date": date,
+        "content": content_text,
+        "links": links
+    }
+
+
+async def _extract_announcement_body(page: Page, url: str) -> tuple[list, list]:
+    content_text = []
+    for selector in CONTENT_SELECTORS:
+        content_paragraphs = page.locator(selector)
+        count = await content_paragraphs.count()
+        if count > 0:
+            print(f"Found {count} paragraphs with selector: {selector}")
+            for i in range(count):
+                text = (await content_paragraphs.nth(i).inner_text()).strip()
+                if text:
+                    content_text.append(text)
+            if content_text:
+                break
+
+    links = []
+    for selector in LINK_SELECTORS:
+        content_links = page.locator(selector)
+        count = await content_links.count()
+        if count > 0:
+            print(f"Found {count} links with selector: {selector}")
+            for i in range(count):
+                link = content_links.nth(i)
+                href = await link.get_attribute('href')
+                text = (await link.inner_text()).strip()
+                if href and 'addtoany' not in href.lower():
+                    links.append({
+                        'text': text,
+                        'href': resolve_link(href, url)
+                    })
+            if links:
+                break
+
+    return content_text, links
+
+
+def _load_announcement(url: str, budget: LatencyBudget) -> tuple[dict, str]:
+    """
+    Return the parsed announcement, served from the page cache when fresh.
+
+    Expired entries are revalidated with a conditional GET; otherwise the
+    static HTML is parsed, falling back to the browser pool.
+    """
+    return _load_cached(
+        url,
+        budget,
+        parse=lambda html: parse_announcement(html, url),
+        scrape=lambda page: _scrape_announcement_page(page, url, budget),
+    )
+
+
+def _announcement_result(related_announcement: dict, source: str, budget: LatencyBudget) -> dict:
+    content_text = related_announcement["content"]
+
+    return {
+        "title": related_announcement["title"],
+        "date": related_announcement["date"],
+        "content": content_text[0] if content_text else "",
+        "links": related_announcement["links"],
+        "metadata": {**budget.metadata(), "source": source}
+    }
+
+
+def _scrape_announcement(url: str):
     """
     Extract detailed information from a single announcement page on the school website.
 
@@ -86,6 +339,7 @@ def scrape_announcement(runtime: ToolRuntime[Context],url: str):
             - content (str): The main text content/body of the announcement
             - links (list): List of dictionaries with 'text' and 'href' keys for
                            any downloadable files or referenced URLs
+            - metadata (dict): Latency budget and per-wait timing breakdown (ms)
 
     Use cases:
         - Get full details of a specific announcement from the list
@@ -97,126 +351,34 @@ def scrape_announcement(runtime: ToolRuntime[Context],url: str):
         Use this after scrape_announcements() to get full details of interesting items,
         especially when you need to access attached PDF files or read complete content.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-            ]
-        )
-
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            viewport={'width': 1920, 'height': 1080},
-            locale='tr-TR',
-        )
-
-        page = context.new_page()
-
-        # Hide webdriver property
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
-
-        print(f"Navigating to {url}...")
-        page.goto(url, timeout=60000, wait_until='domcontentloaded')
-
-        print("Waiting for page to fully load...")
-        time.sleep(3)
-
-        page.wait_for_selector('.blog-area .info', timeout=30000, state='visible')
-
-        info = page.locator(".blog-area .info").first
-
-        title = info.locator("h3").inner_text().strip()
-        print(f"Found title: {title}\n")
-
-        date = info.locator(".meta li").nth(0).inner_text().strip()
-        print(f"Found date: {date}\n")
-
-        content_text = []
-        content_selectors = [
-            ".info > p",
-            ".item .info p",
-            ".blog-area .info p"
-        ]
-
-        for selector in content_selectors:
-            content_paragraphs = page.locator(selector)
-            count = content_paragraphs.count()
-            if count > 0:
-                print(f"Found {count} paragraphs with selector: {selector}")
-                for i in range(count):
-                    text = content_paragraphs.nth(i).inner_text().strip()
-                    if text:
-                        content_text.append(text)
-                if content_text:
-                    break
-
-        links = []
-        link_selectors = [
-            ".info p a",
-            ".item .info a[href*='pdf']",
-            ".blog-area .info a"
-        ]
-
-        for selector in link_selectors:
-            content_links = page.locator(selector)
-            count = content_links.count()
-            if count > 0:
-                print(f"Found {count} links with selector: {selector}")
-                for i in range(count):
-                    link = content_links.nth(i)
-                    href = link.get_attribute('href')
-                    text = link.inner_text().strip()
-                    if href and 'addtoany' not in href.lower():
-                        if href.startswith('../'):
-                            href = url.rsplit('/', 2)[0] + '/' + href.replace('../', '')
-                        elif not href.startswith('http'):
-                            base_url = '/'.join(url.split('/')[:3])
-                            href = base_url + '/' + href.lstrip('/')
-
-                        links.append({
-                            'text': text,
-                            'href': href
-                        })
-                if links:
-                    break
-
-        browser.close()
-
-        related_announcement = {
-            "title": title,
-            "date": date,
-            "content": content_text,
-            "links": links
-        }
+    budget = LatencyBudget(settings.scrape_latency_budget)
+    related_announcement, source = _load_announcement(url, budget)
+    return _announcement_result(related_announcement, source, budget)
 
-        runtime.state["related_announcement"] = related_announcement
 
-        return {
-            "title": title,
-            "date": date,
-            "content": content_text[0] if content_text else "",
-            "links": links
-        }
+async def _ascrape_announcement(url: str):
+    """Async variant of scrape_announcement used under astream/ainvoke."""
+    budget = LatencyBudget(settings.scrape_latency_budget)
+    related_announcement, source = await asyncio.to_thread(_load_announcement, url, budget)
+    return _announcement_result(related_announcement, source, budget)
 
 
-@tool
-def query_school_regulations(
-        runtime: ToolRuntime[Context],
+scrape_announcement = StructuredTool.from_function(
+    func=_scrape_announcement,
+    coroutine=_ascrape_announcement,
+    name="scrape_announcement",
+)
+
+
+def _query_school_regulations(
         query: str,
-        k: Optional[int] = 5
+        k: Optional[int] = 5,
+        search_type: Optional[Literal["similarity", "mmr"]] = None
 ):
     """
-    Search through school regulations and directives using semantic similarity.
+    Search through school regulations and directives using semantic and keyword matching.
 
-    This tool performs a semantic search across all stored school regulations,
+    This tool performs a hybrid (semantic + keyword) search across all stored school regulations,
     directives (yönergeler), and official documents that have been added to the
     vector store. It returns the most relevant document chunks based on the query.
 
@@ -239,6 +401,10 @@ def query_school_regulations(
                     Can be in Turkish or English.
         k (int, optional): Number of most relevant document chunks to return.
                           Defaults to 5. Range: 1-20.
+        search_type (str, optional): "similarity" for the k most relevant chunks, or
+                          "mmr" for k relevant but mutually different chunks; use "mmr"
+                          when earlier results repeated the same passage or the question
+                          spans several regulations. Defaults to the configured type.
 
     Returns:
         dict: A dictionary containing:
@@ -246,11 +412,14 @@ def query_school_regulations(
             - num_results (int): Number of results returned
             - results (list): List of relevant document chunks, each containing:
                 - content (str): The text content of the chunk
-                - metadata (dict): Document metadata including:
+                - metadata (dict): Citation fields of the chunk:
                     - source_url (str): Original PDF URL
                     - page (int): Page number in the PDF
                     - source (str): File path/name
-                - relevance_score (float): Similarity score (if available)
+                - relevance_score (float): Score relative to the best result of this search
+                                           (1.0 = best chunk). It only compares the chunks of
+                                           one search; it is not a similarity percentage, so a
+                                           low value does not mean the chunk is irrelevant
 
     Example queries:
         - "Mazeret sınavı nasıl alınır?"
@@ -260,184 +429,266 @@ def query_school_regulations(
         - "Uluslararası öğrenci kabul kriterleri"
 
     Note:
-        - Results are ranked by semantic similarity to the query
+        - Results are ranked by semantic similarity fused with keyword (BM25) matches,
+          so article numbers ("madde 12") and abbreviations ("AGNO") are found exactly
         - The tool searches across all uploaded regulation PDFs
         - Requires OPENAI_API_KEY environment variable for embeddings
     """
 
     k = max(1, min(k, 20))
+    search_type = _search_type(search_type)
 
     try:
 
-        print(f"Searching for: '{query}' (returning top {k} results)")
-        results = store.similarity_search_with_score(query, k=k)
+        print(f"Searching for: '{query}' (returning top {k} {search_type} results)")
+        if search_type == "mmr":
+            results = regulation_search.mmr_search(
+                query, k=k, fetch_k=settings.mmr_fetch_k, lambda_mult=settings.mmr_lambda
+            )
+        else:
+            results = regulation_search.search(query, k=k)
 
-        formatted_results = []
-        for doc, score in results:
-            formatted_results.append({
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "relevance_score": float(score)
-            })
+        return _format_regulation_results(query, results)
 
-        runtime.state["regulation_search_results"] = formatted_results
-        runtime.state["last_regulation_query"] = query
+    except Exception as e:
+        return _regulation_error(query, e)
 
-        response = {
-            "query": query,
-            "num_results": len(formatted_results),
-            "results": formatted_results
-        }
 
-        print(f"✓ Found {len(formatted_results)} relevant document chunks")
+async def _aquery_school_regulations(
+        query: str,
+        k: Optional[int] = 5,
+        search_type: Optional[Literal["similarity", "mmr"]] = None
+):
+    """Async variant of query_school_regulations used under astream/ainvoke."""
+
+    k = max(1, min(k, 20))
+    search_type = _search_type(search_type)
+
+    try:
 
-        return response
+        print(f"Searching for: '{query}' (returning top {k} {search_type} results)")
+        if search_type == "mmr":
+            results = await regulation_search.ammr_search(
+                query, k=k, fetch_k=settings.mmr_fetch_k, lambda_mult=settings.mmr_lambda
+            )
+        else:
+            results = await regulation_search.asearch(query, k=k)
+
+        return _format_regulation_results(query, results)
 
     except Exception as e:
-        error_msg = f"Error querying vector store: {str(e)}"
-        print(f"✗ {error_msg}")
-        return {
-            "error": error_msg,
-            "query": query,
-            "num_results": 0,
-            "results": []
-        }
+        return _regulation_error(query, e)
 
-@tool
-def scrape_announcements(
-        runtime: ToolRuntime[Context],
-        time_range: Optional[Literal["1d", "1w", "1m", "3m", "6m", "1y", "all"]] = "all"
-):
-    """
-    Scrape announcements from School's department website with optional time filtering.
 
-    Args:
-        runtime: The tool runtime context containing the URL
-        time_range: Time range to filter announcements. Options:
-            - "1d": Last 1 day
-            - "1w": Last 1 week
-            - "1m": Last 1 month  (default)
-            - "3m": Last 3 months
-            - "6m": Last 6 months
-            - "1y": Last 1 year
-            - "all": All announcements
+def _search_type(search_type: Optional[str]) -> str:
+    search_type = search_type or settings.regulation_search_type
+    return search_type if search_type in SEARCH_TYPES else "similarity"
 
-    Returns:
-        List of announcements within the specified time range
+
+def _format_regulation_results(query: str, results: list) -> dict:
+    # Hybrid search returns RRF scores and the dense fallback cosine similarities;
+    # scaling by the best hit gives both the same meaning. MMR results are not in score order.
+    best_score = max((score for _, score in results), default=0)
+
+    formatted_results = []
+    for doc, score in results:
+        formatted_results.append({
+            "content": doc.page_content,
+            # Enough of the metadata to cite the chunk
+            "metadata": {key: doc.metadata[key] for key in REGULATION_CITATION_FIELDS if key in doc.metadata},
+            "relevance_score": float(score / best_score) if best_score > 0 else 0.0
+        })
+
+    print(f"✓ Found {len(formatted_results)} relevant document chunks")
+
+    return {
+        "query": query,
+        "num_results": len(formatted_results),
+        "results": formatted_results
+    }
+
+
+def _regulation_error(query: str, e: Exception) -> dict:
+    error_msg = f"Error querying vector store: {str(e)}"
+    print(f"✗ {error_msg}")
+    return {
+        "error": error_msg,
+        "query": query,
+        "num_results": 0,
+        "results": []
+    }
+
+
+query_school_regulations = StructuredTool.from_function(
+    func=_query_school_regulations,
+    coroutine=_aquery_school_regulations,
+    name="query_school_regulations",
+)
+
+
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """Parse date string in DD.MM.YYYY format"""
+    try:
+        return datetime.strptime(date_str, '%d.%m.%Y')
+    except (ValueError, AttributeError):
+        return None
+
+
+def _get_cutoff_date(time_range: str) -> Optional[datetime]:
+    """Calculate the cutoff date based on time range"""
+    if time_range == "all":
+        return None
+
+    now = datetime.now()
+    time_deltas = {
+        "1d": timedelta(days=1),
+        "1w": timedelta(weeks=1),
+        "1m": timedelta(days=30),
+        "3m": timedelta(days=90),
+        "6m": timedelta(days=180),
+        "1y": timedelta(days=365),
+    }
+
+    delta = time_deltas.get(time_range)
+    return now - delta if delta else None
+
+
+async def _scrape_announcements_page(page: Page, url: str, budget: LatencyBudget) -> list:
     """
+    Collect title, link and date of each item on the department's announcement list.
 
-    def parse_date(date_str: str) -> Optional[datetime]:
-        """Parse date string in DD.MM.YYYY format"""
-        try:
-            return datetime.strptime(date_str, '%d.%m.%Y')
-        except (ValueError, AttributeError):
-            return None
-
-    def get_cutoff_date(time_range: str) -> Optional[datetime]:
-        """Calculate the cutoff date based on time range"""
-        if time_range == "all":
-            return None
-
-        now = datetime.now()
-        time_deltas = {
-            "1d": timedelta(days=1),
-            "1w": timedelta(weeks=1),
-            "1m": timedelta(days=30),
-            "3m": timedelta(days=90),
-            "6m": timedelta(days=180),
-            "1y": timedelta(days=365),
-        }
+    The page is considered ready once an item title link is rendered; no
+    fixed sleep or networkidle wait is needed for the fields read below.
+    """
+    announcement_url = url + "/Duyurular"
+
+    budget.mark("acquire_page")
 
-        delta = time_deltas.get(time_range)
-        return now - delta if delta else None
+    with budget.step("goto"):
+        await page.goto(announcement_url, timeout=budget.remaining_ms(), wait_until='domcontentloaded')
 
-    with sync_playwright() as p:
-        url = runtime.context.url
-        announcement_url = url + "/Duyurular"
+    with budget.step("wait_items"):
+        await page.wait_for_selector('.trending-courses-items .item h5 a', timeout=budget.remaining_ms(), state='visible')
 
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-            ]
-        )
+    items = await page.query_selector_all('.trending-courses-items .item')
 
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            viewport={'width': 1920, 'height': 1080},
-            locale='tr-TR',
-        )
+    announcements = []
 
-        page = context.new_page()
+    for idx, item in enumerate(items):
+        title_element = await item.query_selector('h5 a')
+        if not title_element:
+            print(f"Skipping item {idx}: no title element found")
+            continue
 
-        # Hide webdriver property
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
+        title = (await title_element.inner_text()).strip()
+        relative_link = await title_element.get_attribute('href')
 
-        page.goto(announcement_url, timeout=60000, wait_until='domcontentloaded')
+        if not relative_link:
+            print(f"Skipping item {idx}: no link found")
+            continue
 
-        time.sleep(3)
+        full_link = f"{url}/{relative_link}"
 
-        page.wait_for_selector('.trending-courses-items', timeout=30000, state='visible')
-        page.wait_for_selector('.trending-courses-items .item', timeout=30000, state='visible')
-        page.wait_for_load_state('networkidle', timeout=30000)
+        meta_element = await item.query_selector('.meta')
 
-        items = page.query_selector_all('.trending-courses-items .item')
+        if not meta_element:
+            print(f"Skipping item {idx}: no meta element found")
+            continue
 
-        announcements = []
-        cutoff_date = get_cutoff_date(time_range)
+        meta_text = await meta_element.inner_text()
 
-        for idx, item in enumerate(items):
-            title_element = item.query_selector('h5 a')
-            if not title_element:
-                print(f"Skipping item {idx}: no title element found")
-                continue
+        date_match = re.search(r'(\d{2}\.\d{2}\.\d{4})', meta_text)
+        date_str = date_match.group(1) if date_match else "N/A"
+
+        announcement = {
+            'title': title,
+            'url': full_link,
+            'date': date_str,
+        }
 
-            title = title_element.inner_text().strip()
-            relative_link = title_element.get_attribute('href')
+        announcements.append(announcement)
 
-            if not relative_link:
-                print(f"Skipping item {idx}: no link found")
-                continue
+    return announcements
 
-            full_link = f"{url}/{relative_link}"
 
-            meta_element = item.query_selector('.meta')
+def _filter_by_time_range(announcements: list, time_range: str) -> list:
+    """Drop announcements older than the time range; undated ones are kept."""
+    cutoff_date = _get_cutoff_date(time_range)
+    if cutoff_date is None:
+        return announcements
 
-            if not meta_element:
-                print(f"Skipping item {idx}: no meta element found")
-                continue
+    filtered = []
+    for announcement in announcements:
+        announcement_date = _parse_date(announcement['date'])
+        if announcement_date and announcement_date < cutoff_date:
+            continue
+        filtered.append(announcement)
 
-            meta_text = meta_element.inner_text()
+    return filtered
 
-            date_match = re.search(r'(\d{2}\.\d{2}\.\d{4})', meta_text)
-            date_str = date_match.group(1) if date_match else "N/A"
 
-            if cutoff_date and date_str != "N/A":
-                announcement_date = parse_date(date_str)
-                if announcement_date and announcement_date < cutoff_date:
-                    continue
+def _load_announcements(url: str, budget: LatencyBudget) -> tuple[list, str]:
+    """Return the department's full announcement list, cached per department URL."""
+    return _load_cached(
+        url + "/Duyurular",
+        budget,
+        parse=lambda html: parse_announcements(html, url),
+        scrape=lambda page: _scrape_announcements_page(page, url, budget),
+    )
 
-            announcement = {
-                'title': title,
-                'url': full_link,
-                'date': date_str,
-            }
 
-            announcements.append(announcement)
+def _announcements_result(time_range: str, announcements: list, source: str, budget: LatencyBudget) -> dict:
+    announcements = _filter_by_time_range(announcements, time_range)
 
-        browser.close()
+    return {
+        'count': len(announcements),
+        'time_range': time_range,
+        'announcements': announcements,
+        'metadata': {**budget.metadata(), 'source': source}
+    }
 
-        runtime.state["announcements"] = announcements
 
-        return {
-            'count': len(announcements),
-            'time_range': time_range,
-            'announcements': announcements
-        }
\ No newline at end of file
+def _scrape_announcements(
+        runtime: ToolRuntime[Context],
+        time_range: Optional[Literal["1d", "1w", "1m", "3m", "6m", "1y", "all"]] = "all"
+):
+    """
+    Scrape announcements from School's department website with optional time filtering.
+
+    Args:
+        runtime: The tool runtime context containing the URL
+        time_range: Time range to filter announcements. Options:
+            - "1d": Last 1 day
+            - "1w": Last 1 week
+            - "1m": Last 1 month  (default)
+            - "3m": Last 3 months
+            - "6m": Last 6 months
+            - "1y": Last 1 year
+            - "all": All announcements
+
+    Returns:
+        List of announcements within the specified time range, plus a
+        metadata entry with the latency budget and per-wait timings (ms)
+    """
+    url = runtime.context.url
+    budget = LatencyBudget(settings.scrape_latency_budget)
+    announcements, source = _load_announcements(url, budget)
+    return _announcements_result(time_range, announcements, source, budget)
+
+
+async def _ascrape_announcements(
+        runtime: ToolRuntime[Context],
+        time_range: Optional[Literal["1d", "1w", "1m", "3m", "6m", "1y", "all"]] = "all"
+):
+    """Async variant of scrape_announcements used under astream/ainvoke."""
+    url = runtime.context.url
+    budget = LatencyBudget(settings.scrape_latency_budget)
+    announcements, source = await asyncio.to_thread(_load_announcements, url, budget)
+    return _announcements_result(time_range, announcements, source, budget)
+
+
+scrape_announcements = StructuredTool.from_function(
+    func=_scrape_announcements,
+    coroutine=_ascrape_announcements,
+    name="scrape_announcements",
+)
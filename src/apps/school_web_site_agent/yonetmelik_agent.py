@@ -1,18 +1,23 @@
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain.agents import create_agent
 
-from apps.school_web_site_agent.state import State
+from core.history import ToolHistoryCompaction
 from core.llm import llm
 from apps.school_web_site_agent.tools import query_school_regulations
 from apps.school_web_site_agent.context import Context
+from settings import settings
 
 SYSTEM_PROMPT = """
 Sen Üniversite Yönetmeliklerine ve Yönergelerine erişebilen bir asistansın. Kullanıcılara okul yönetmelikleri, 
 yönergeler ve resmi belgeler hakkında bilgi vermek için tasarlandın.
 
 Kullanabileceğin araçlar:
-1. query_school_regulations: Yönetmelik ve yönergelerde semantik arama yapar. Kullanıcının sorusuna en uygun 
-   doküman parçalarını bulur. (varsayılan 5 sonuç, maksimum 20)
+1. query_school_regulations: Yönetmelik ve yönergelerde semantik ve anahtar kelime (BM25) araması yapar.
+   Kullanıcının sorusuna en uygun doküman parçalarını bulur. (varsayılan 5 sonuç, maksimum 20)
+   relevance_score aramadaki en iyi sonuca göre ölçeklenmiş bir skordur (en iyi parça 1.0);
+   bir benzerlik oranı değildir, düşük olması parçanın ilgisiz olduğu anlamına gelmez,
+   içeriğe bakarak karar ver.
+   Sonuçlar aynı bölümü tekrar ediyorsa veya soru birden fazla yönetmeliği kapsıyorsa
+   search_type="mmr" ile birbirinden farklı parçalar iste.
 
 Kapsadığın konular:
 - Mazeret sınavları prosedürleri
@@ -60,13 +65,14 @@ Sen: query_school_regulations("muafiyet başvuru prosedürü belgeler") kullan -
 - Tarih, süre ve sayısal bilgileri tam olarak aktar
 """
 
-checkpointer = InMemorySaver()
-
 agent = create_agent(
     model=llm,
     system_prompt=SYSTEM_PROMPT,
     tools=[query_school_regulations],
-    state_schema=State,
     context_schema=Context,
-    checkpointer=checkpointer
+    middleware=[ToolHistoryCompaction(settings.agent_history_max_tokens, settings.agent_tool_digest_chars)],
+    # Runs as a subgraph of the orchestrator, whose checkpoint is the single
+    # store of the thread's messages; the agent writes no checkpoints of its own
+    # (see src/scripts/measure_checkpoint_bytes.py).
+    checkpointer=False
 )
\ No newline at end of file
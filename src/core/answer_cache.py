@@ -0,0 +1,240 @@
+"""
+Semantic answer cache scoped by a partition key (e.g. course_id).
+
+A new question is compared against the embeddings of previously answered
+questions in the same partition; if the best cosine similarity reaches the
+threshold the stored answer is reused. Partitions are invalidated as a whole
+when the documents behind them change.
+
+The answers live in each worker process. Invalidation goes through a
+per-partition version counter in a SQLite file shared by the workers: callers
+read the partition's version before retrieval and pass it to lookup and
+store. Local answers recorded under an older version are discarded, and an
+answer built from documents retrieved before an invalidation is not stored,
+so an invalidation in one worker reaches all of them.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    citations: Optional[str]
+    citation_count: int
+    created_at: float
+    similarity: float = 1.0
+
+
+class _Partition:
+    """Answers of one partition plus their unit-normalized question vectors."""
+
+    def __init__(self, dimension: int, version: int):
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.answers: list[CachedAnswer] = []
+        self.version = version
+
+
+class PartitionVersions:
+    """
+    Invalidation counter per partition, shared by processes through SQLite.
+
+    Args:
+        path: SQLite file (its directory is created if missing)
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS partition_versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM partition_versions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, key: str) -> int:
+        """Move the partition to a new version and return it."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO partition_versions (key, version) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1",
+                (key,),
+            )
+            return self._conn.execute("SELECT version FROM partition_versions WHERE key = ?", (key,)).fetchone()[0]
+
+
+class SemanticAnswerCache:
+    """
+    Per-process answer cache matched by question embedding similarity.
+
+    Args:
+        threshold: Minimum cosine similarity for a hit
+        max_entries: Answers kept per partition; the oldest are dropped first
+        ttl: Seconds an answer may be served
+        versions: Shared invalidation counters, or None when a single process
+                  serves the cache
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl: float, versions: Optional[PartitionVersions] = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions = versions
+
+        self._partitions: dict[str, _Partition] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "stale_stores": 0, "invalidations": 0}
+
+    def version(self, key: str) -> Optional[int]:
+        """
+        Current version of a partition, or None if it cannot be read.
+
+        Read it before retrieving the documents an answer is built from and
+        pass it to lookup() and store().
+        """
+        try:
+            return self.versions.get(key) if self.versions is not None else 0
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read answer cache version of '{key}': {e}")
+            return None
+
+    @staticmethod
+    def _unit(vector: list[float]) -> np.ndarray:
+        data = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(data)
+        return data / norm if norm else data
+
+    def _drop_expired(self, partition: _Partition):
+        cutoff = time.time() - self.ttl
+        keep = [i for i, entry in enumerate(partition.answers) if entry.created_at >= cutoff]
+        if len(keep) != len(partition.answers):
+            partition.vectors = partition.vectors[keep]
+            partition.answers = [partition.answers[i] for i in keep]
+
+    def lookup(self, key: str, vector: list[float], version: Optional[int]) -> Optional[CachedAnswer]:
+        """
+        Return the closest cached answer in the partition if it reaches the threshold.
+
+        Args:
+            key: Partition key
+            vector: Embedding of the new question
+            version: Partition version from version(); None (unreadable) is a miss
+        """
+        query = self._unit(vector)
+
+        with self._lock:
+            if version is None:
+                # Without the version the answers may be stale
+                self._stats["misses"] += 1
+                return None
+
+            partition = self._partitions.get(key)
+            if partition is not None and partition.version != version:
+                # Invalidated by another worker
+                del self._partitions[key]
+                partition = None
+            if partition is not None:
+                self._drop_expired(partition)
+
+            if partition is None or not partition.answers or partition.vectors.shape[1] != query.shape[0]:
+                self._stats["misses"] += 1
+                return None
+
+            similarities = partition.vectors @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["hits"] += 1
+            entry = partition.answers[best]
+            return CachedAnswer(
+                question=entry.question,
+                answer=entry.answer,
+                citations=entry.citations,
+                citation_count=entry.citation_count,
+                created_at=entry.created_at,
+                similarity=float(similarities[best]),
+            )
+
+    def store(
+        self,
+        key: str,
+        version: Optional[int],
+        question: str,
+        vector: list[float],
+        answer: str,
+        citations: Optional[str] = None,
+        citation_count: int = 0,
+    ):
+        """
+        Add an answer to the partition, dropping the oldest entries over max_entries.
+
+        Args:
+            key: Partition key
+            version: Partition version read before the answer's documents were
+                     retrieved; the answer is dropped if the partition moved on since
+            question: Question the answer was generated for
+            vector: Embedding of the question
+            answer: Generated answer
+            citations: Citation footer appended to the answer
+            citation_count: Number of cited documents
+        """
+        unit = self._unit(vector)
+        entry = CachedAnswer(
+            question=question,
+            answer=answer,
+            citations=citations,
+            citation_count=citation_count,
+            created_at=time.time(),
+        )
+
+        current = self.version(key)
+
+        with self._lock:
+            if version is None or version != current:
+                # Invalidated while the answer was generated, or the version is unknown
+                self._stats["stale_stores"] += 1
+                return
+
+            partition = self._partitions.get(key)
+            if partition is None or partition.vectors.shape[1] != unit.shape[0] or partition.version != version:
+                partition = self._partitions[key] = _Partition(unit.shape[0], version)
+
+            partition.vectors = np.vstack([partition.vectors, unit[None, :]])[-self.max_entries:]
+            partition.answers = (partition.answers + [entry])[-self.max_entries:]
+            self._stats["stored"] += 1
+
+    def invalidate(self, key: str):
+        """Forget every answer of a partition, in every process sharing the versions."""
+        if self.versions is not None:
+            self.versions.bump(key)
+        with self._lock:
+            self._partitions.pop(key, None)
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "partitions": len(self._partitions),
+                "entries": sum(len(p.answers) for p in self._partitions.values()),
+            }
@@ -0,0 +1,120 @@
+"""
+Side store for bulky per-thread payloads (retrieved chunks, PDF splits,
+search results) that should not live in checkpointed graph state.
+
+Graph state keeps only a small reference ({"blob_id", "bytes", "items"});
+the payload is written once as JSON under
+
+    <directory>/<namespace>/<sha256(thread_id)>/<blob_id>.json
+
+where namespace is the graph name used for the thread's checkpointer. Blobs
+are content-addressed within a thread, so an unchanged payload is not
+written twice. They expire with their thread: the checkpointers call
+delete_thread when they drop a thread, and threads untouched for longer than
+ttl are purged on write as a fallback (e.g. after a restart of the memory
+backend).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Optional
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    Disk-backed blob store partitioned by graph namespace and thread.
+
+    Args:
+        directory: Root directory (created if missing)
+        ttl: Seconds after the last write to a thread before its blobs are purged, or None
+    """
+
+    PURGE_INTERVAL = 300.0
+
+    def __init__(self, directory: str, ttl: Optional[float] = None):
+        self.directory = directory
+        self.ttl = ttl
+        self._last_purge = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _thread_dir(self, namespace: str, thread_id: str) -> str:
+        return os.path.join(self.directory, namespace, hashlib.sha256(thread_id.encode("utf-8")).hexdigest())
+
+    def put(self, namespace: str, thread_id: str, value: Any) -> dict:
+        """
+        Store a JSON-serializable payload for a thread.
+
+        Returns:
+            Reference to keep in graph state instead of the payload
+        """
+        data = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+        blob_id = hashlib.sha256(data).hexdigest()[:32]
+
+        directory = self._thread_dir(namespace, thread_id)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{blob_id}.json")
+
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        # The directory mtime marks the thread as recently used
+        os.utime(directory)
+        self._maybe_purge()
+
+        return {
+            "blob_id": blob_id,
+            "bytes": len(data),
+            "items": len(value) if isinstance(value, (list, dict)) else 1,
+        }
+
+    def get(self, namespace: str, thread_id: str, ref: Optional[dict]) -> Any:
+        """Load the payload behind a reference, or None if it is missing or expired."""
+        if not ref:
+            return None
+        path = os.path.join(self._thread_dir(namespace, thread_id), f"{ref['blob_id']}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            logger.warning(f"Blob {ref['blob_id']} of thread {thread_id} is missing")
+            return None
+
+    def delete_thread(self, namespace: str, thread_id: str):
+        shutil.rmtree(self._thread_dir(namespace, thread_id), ignore_errors=True)
+
+    def _maybe_purge(self):
+        now = time.time()
+        if self.ttl is None or now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+
+        cutoff = now - self.ttl
+        for namespace in os.scandir(self.directory):
+            if not namespace.is_dir():
+                continue
+            for thread in os.scandir(namespace.path):
+                try:
+                    if thread.is_dir() and thread.stat().st_mtime < cutoff:
+                        shutil.rmtree(thread.path, ignore_errors=True)
+                except OSError as e:
+                    logger.debug(f"Could not purge {thread.path}: {e}")
+
+
+blob_store = BlobStore(settings.blob_store_dir, ttl=settings.checkpoint_ttl)
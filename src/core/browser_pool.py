@@ -0,0 +1,275 @@
+"""
+Process-wide pool of warm Playwright browsers for the scraping tools.
+
+Playwright objects are bound to the event loop that created them, while the
+tools are called both from executor threads (sync invoke) and from the
+uvicorn event loop (astream). The pool therefore owns a single background
+event loop thread running async Playwright; callers submit page jobs to it
+with run() or arun() and get the job's result back.
+
+Each pool slot is a long-lived browser context with one tab and the
+stealth init script already applied, so a tool call only has to navigate.
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+]
+
+CONTEXT_OPTIONS = {
+    "user_agent": 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    "viewport": {'width': 1920, 'height': 1080},
+    "locale": 'tr-TR',
+}
+
+# Hide webdriver property
+INIT_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+
+class BrowserPoolTimeout(TimeoutError):
+    """Raised when no warm page becomes free within the acquire timeout."""
+
+
+@dataclass
+class _Slot:
+    browser_index: int
+    context: Optional[BrowserContext] = None
+    page: Optional[Page] = None
+    pages_served: int = 0
+
+
+class BrowserPool:
+    """
+    Pool of long-lived Chromium browsers and warm tabs.
+
+    Args:
+        size: Number of Chromium processes to keep running
+        pages_per_browser: Warm tabs (one context each) per browser
+        recycle_after: Recreate a tab's context after it served this many pages
+        acquire_timeout: Seconds to wait for a free tab before giving up
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        pages_per_browser: int = 4,
+        recycle_after: int = 100,
+        acquire_timeout: float = 30.0,
+    ):
+        self.size = max(1, size)
+        self.pages_per_browser = max(1, pages_per_browser)
+        self.recycle_after = max(1, recycle_after)
+        self.acquire_timeout = acquire_timeout
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # Only touched from the pool loop
+        self._playwright: Optional[Playwright] = None
+        self._browsers: list[Optional[Browser]] = [None] * self.size
+        self._browser_locks: list[asyncio.Lock] = []
+        self._slots: Optional[asyncio.Queue] = None
+        self._releases: set[asyncio.Task] = set()
+
+        self._stats = {
+            "jobs": 0,
+            "failed_jobs": 0,
+            "cancelled_jobs": 0,
+            "acquire_timeouts": 0,
+            "browser_launches": 0,
+            "context_recycles": 0,
+        }
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+                thread.start()
+                try:
+                    asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                except BaseException:
+                    # Don't leave a half-started Playwright and an idle loop thread behind
+                    self._stop_loop(loop, thread)
+                    raise
+                self._loop = loop
+                self._thread = thread
+                atexit.register(self.close)
+            return self._loop
+
+    async def _setup(self):
+        self._playwright = await async_playwright().start()
+        self._browser_locks = [asyncio.Lock() for _ in range(self.size)]
+        self._slots = asyncio.Queue()
+        for browser_index in range(self.size):
+            for _ in range(self.pages_per_browser):
+                self._slots.put_nowait(_Slot(browser_index=browser_index))
+
+    async def _get_browser(self, index: int) -> Browser:
+        async with self._browser_locks[index]:
+            browser = self._browsers[index]
+            if browser is None or not browser.is_connected():
+                if browser is not None:
+                    logger.warning(f"Browser {index} disconnected, relaunching")
+                browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+                self._browsers[index] = browser
+                self._stats["browser_launches"] += 1
+            return browser
+
+    async def _close_slot(self, slot: _Slot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Exception as e:
+                logger.debug(f"Ignoring error while closing context: {e}")
+        slot.context = None
+        slot.page = None
+        slot.pages_served = 0
+
+    async def _release_closed(self, slot: _Slot):
+        """Close a slot's context, then hand the slot back to the queue."""
+        try:
+            await self._close_slot(slot)
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def _prepare_slot(self, slot: _Slot) -> Page:
+        """Health-check a slot and (re)create its context and tab if needed."""
+        browser = await self._get_browser(slot.browser_index)
+
+        healthy = (
+            slot.page is not None
+            and not slot.page.is_closed()
+            and slot.context.browser is browser
+        )
+
+        if healthy and slot.pages_served >= self.recycle_after:
+            self._stats["context_recycles"] += 1
+            healthy = False
+
+        if not healthy:
+            await self._close_slot(slot)
+            slot.context = await browser.new_context(**CONTEXT_OPTIONS)
+            await slot.context.add_init_script(INIT_SCRIPT)
+            slot.page = await slot.context.new_page()
+
+        return slot.page
+
+    async def _run(self, job: Callable[[Page], Awaitable[Any]], acquire_timeout: Optional[float]):
+        timeout = self.acquire_timeout if acquire_timeout is None else acquire_timeout
+
+        try:
+            slot = await asyncio.wait_for(self._slots.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._stats["acquire_timeouts"] += 1
+            raise BrowserPoolTimeout(f"No browser page became free within {timeout}s")
+
+        try:
+            page = await self._prepare_slot(slot)
+            slot.pages_served += 1
+            self._stats["jobs"] += 1
+            result = await job(page)
+        except Exception:
+            # Don't hand a tab in an unknown state to the next caller
+            self._stats["failed_jobs"] += 1
+            await self._release_closed(slot)
+            raise
+        except BaseException:
+            # Cancelled mid-job: close the tab in its own task so the
+            # cancellation isn't delayed, and only then free the slot
+            self._stats["cancelled_jobs"] += 1
+            task = asyncio.get_running_loop().create_task(self._release_closed(slot))
+            self._releases.add(task)
+            task.add_done_callback(self._releases.discard)
+            raise
+
+        self._slots.put_nowait(slot)
+        return result
+
+    def run(self, job: Callable[[Page], Awaitable[Any]], acquire_timeout: Optional[float] = None):
+        """
+        Run an async page job on a pooled tab and block until it finishes.
+
+        Args:
+            job: Coroutine function receiving a warm Page
+            acquire_timeout: Override of the pool's acquire timeout (seconds)
+
+        Returns:
+            Whatever the job returns
+        """
+        future = asyncio.run_coroutine_threadsafe(self._run(job, acquire_timeout), self._ensure_loop())
+        return future.result()
+
+    async def arun(self, job: Callable[[Page], Awaitable[Any]], acquire_timeout: Optional[float] = None):
+        """Async variant of run() for callers living on another event loop."""
+        future = asyncio.run_coroutine_threadsafe(self._run(job, acquire_timeout), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        """Return pool counters and the number of currently free tabs."""
+        return {
+            **self._stats,
+            "size": self.size,
+            "pages_per_browser": self.pages_per_browser,
+            "free_pages": self._slots.qsize() if self._slots is not None else self.size * self.pages_per_browser,
+        }
+
+    async def _shutdown(self):
+        for browser in self._browsers:
+            if browser is not None:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    logger.debug(f"Ignoring error while closing browser: {e}")
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def _stop_loop(self, loop: asyncio.AbstractEventLoop, thread: threading.Thread):
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Error while shutting down browser pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+        if not thread.is_alive():
+            loop.close()
+        self._playwright = None
+        self._browsers = [None] * self.size
+
+    def close(self):
+        """Close all browsers and stop the pool loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        self._stop_loop(loop, thread)
+
+
+browser_pool = BrowserPool(
+    size=settings.browser_pool_size,
+    pages_per_browser=settings.browser_pages_per_browser,
+    recycle_after=settings.browser_recycle_after,
+    acquire_timeout=settings.browser_acquire_timeout,
+)
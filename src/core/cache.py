@@ -0,0 +1,193 @@
+"""
+Thread-safe TTL cache with LRU eviction under a memory cap.
+
+Entries keep the HTTP validators (ETag / Last-Modified) of the response they
+were built from, so an expired entry can be revalidated with a conditional
+request instead of being fetched and parsed again, and served stale when the
+revalidation fails.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def conditional_headers(self) -> dict:
+        """Headers for a conditional GET revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class _KeyLock:
+    """Per-key lock plus the number of callers holding or waiting for it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value in bytes."""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+class TTLCache:
+    """
+    TTL cache shared across threads, evicting least recently used entries
+    once the summed entry size exceeds max_bytes.
+
+    Args:
+        ttl: Seconds an entry is served without revalidation
+        max_bytes: Memory cap for all entries together
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, _KeyLock] = {}
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "coalesced": 0,
+            "stale": 0,
+            "evictions": 0,
+        }
+
+    def acquire_key(self, key: str):
+        """
+        Take the per-key lock used to collapse concurrent misses for the same
+        key into a single fetch. Every call must be paired with release_key.
+        """
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = self._key_locks[key] = _KeyLock()
+            key_lock.users += 1
+        key_lock.lock.acquire()
+
+    def release_key(self, key: str):
+        """Release the per-key lock; it is dropped once no caller holds or waits for it."""
+        with self._lock:
+            key_lock = self._key_locks[key]
+            key_lock.lock.release()
+            key_lock.users -= 1
+            if key_lock.users == 0:
+                del self._key_locks[key]
+
+    def lookup(self, key: str, count: bool = True) -> Optional[CacheEntry]:
+        """
+        Return the entry for key, fresh or expired, and count a hit or miss.
+
+        Callers serve fresh entries directly and revalidate expired ones.
+
+        Args:
+            key: Cache key
+            count: Set to False for a re-check that should not move the counters
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            if count:
+                if entry is not None and entry.fresh:
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["misses"] += 1
+            return entry
+
+    def record_coalesced(self):
+        """Count a miss that was served by another caller's in-flight fetch."""
+        with self._lock:
+            self._stats["coalesced"] += 1
+
+    def record_stale(self):
+        """Count an expired entry served because its revalidation failed."""
+        with self._lock:
+            self._stats["stale"] += 1
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CacheEntry:
+        """Store a value and evict LRU entries until under the memory cap."""
+        entry = CacheEntry(
+            value=value,
+            size=estimate_size(value),
+            expires_at=time.monotonic() + self.ttl,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+
+            self._entries[key] = entry
+            self._bytes += entry.size
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+
+        return entry
+
+    def refresh(self, key: str) -> Optional[CacheEntry]:
+        """Extend the TTL of an entry after a 304 Not Modified response."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + self.ttl
+                self._stats["revalidated"] += 1
+            return entry
+
+    def invalidate(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus current entry count and bytes held."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
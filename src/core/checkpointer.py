@@ -0,0 +1,543 @@
+"""
+Checkpointers shared by the LangGraph graphs.
+
+The backend is chosen with settings.checkpoint_backend:
+
+memory
+    BoundedInMemorySaver keeps InMemorySaver's storage layout but bounds it
+    for long-running servers:
+
+    - only the newest `keep_checkpoints` checkpoints of each thread/namespace
+      are retained, together with the channel blobs they still reference;
+    - threads idle for longer than `ttl` seconds are dropped;
+    - when the serialized size of all threads exceeds `max_bytes`, the least
+      recently used threads are dropped until it fits.
+
+sqlite
+    BoundedSqliteSaver extends langgraph-checkpoint-sqlite's SqliteSaver, a
+    SQLite database in WAL mode, so several uvicorn workers on one host share
+    conversation state. It adds the same per-thread retention and idle TTL.
+
+Both delete a thread's blob_store payloads when they drop the thread.
+
+With settings.checkpoint_serializer = "compact" both use CompactSerializer
+(core.serde): messages are stored once per thread in a message table that is
+dropped with the thread, and large payloads are zstd-compressed. Every
+serializer call runs inside thread_scope() so the serializer knows which
+thread's table to use.
+
+Further backends (e.g. a networked store shared across hosts) are added by
+registering a factory in CHECKPOINT_BACKENDS.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from core.blob_store import blob_store
+from core.serde import CompactSerializer, InMemoryMessageTable, SqliteMessageTable, thread_scope
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _message_table(saver: BaseCheckpointSaver):
+    """Message table of a saver using CompactSerializer, else None."""
+    return getattr(saver.serde, "table", None)
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    InMemorySaver with per-thread checkpoint retention, idle TTL and a
+    memory cap with LRU eviction of whole threads.
+
+    Args:
+        ttl: Seconds a thread may stay idle before it is evicted, or None
+        max_bytes: Cap for the serialized checkpoints, writes and blobs of all threads
+        keep_checkpoints: Checkpoints retained per thread and namespace, or None for all
+        name: Graph name; when set, the thread's blob_store payloads are
+              deleted together with its checkpoints
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        keep_checkpoints: Optional[int] = 1,
+        name: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.keep_checkpoints = keep_checkpoints
+
+        self._lock = threading.RLock()
+        # thread_id -> last access, least recently used first
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self._thread_bytes: dict[str, int] = {}
+        self._blob_keys: dict[str, set] = {}
+        self._write_keys: dict[str, set] = {}
+        # (thread_id, checkpoint_ns, checkpoint_id) -> channel versions of that checkpoint
+        self._versions: dict[tuple[str, str, str], dict] = {}
+
+        self._stats = {"ttl_evictions": 0, "lru_evictions": 0, "pruned_checkpoints": 0}
+
+    def _touch(self, thread_id: str):
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _measure(self, thread_id: str) -> int:
+        size = 0
+        for checkpoint, metadata, _ in (
+            saved for namespace in self.storage.get(thread_id, {}).values() for saved in namespace.values()
+        ):
+            size += len(checkpoint[1]) + len(metadata[1])
+        for key in self._blob_keys.get(thread_id, ()):
+            blob = self.blobs.get(key)
+            if blob is not None:
+                size += len(blob[1])
+        for key in self._write_keys.get(thread_id, ()):
+            for _, _, value, _ in self.writes.get(key, {}).values():
+                size += len(value[1])
+        if (table := _message_table(self)) is not None:
+            size += table.thread_bytes((self.name or "", thread_id))
+        self._thread_bytes[thread_id] = size
+        return size
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Drop checkpoints beyond keep_checkpoints and the blobs only they referenced."""
+        if self.keep_checkpoints is None:
+            return
+
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints:
+            return
+
+        for checkpoint_id in sorted(checkpoints)[:-self.keep_checkpoints]:
+            del checkpoints[checkpoint_id]
+            self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            self.writes.pop(write_key, None)
+            self._write_keys.get(thread_id, set()).discard(write_key)
+            self._stats["pruned_checkpoints"] += 1
+
+        referenced = set()
+        for checkpoint_id in checkpoints:
+            versions = self._versions.get((thread_id, checkpoint_ns, checkpoint_id), {})
+            referenced.update((thread_id, checkpoint_ns, channel, version) for channel, version in versions.items())
+
+        blob_keys = self._blob_keys.get(thread_id, set())
+        for key in [key for key in blob_keys if key[1] == checkpoint_ns and key not in referenced]:
+            self.blobs.pop(key, None)
+            blob_keys.discard(key)
+
+    def _evict(self, current_thread: str):
+        if self.ttl is not None:
+            cutoff = time.monotonic() - self.ttl
+            for thread_id, last_access in list(self._last_access.items()):
+                if last_access >= cutoff:
+                    break
+                if thread_id != current_thread:
+                    self._drop_thread(thread_id)
+                    self._stats["ttl_evictions"] += 1
+
+        if self.max_bytes is not None:
+            total = sum(self._thread_bytes.values())
+            for thread_id in list(self._last_access):
+                if total <= self.max_bytes:
+                    break
+                if thread_id == current_thread:
+                    continue
+                total -= self._thread_bytes.get(thread_id, 0)
+                self._drop_thread(thread_id)
+                self._stats["lru_evictions"] += 1
+
+    def _drop_thread(self, thread_id: str):
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        for key in [key for key in self._versions if key[0] == thread_id]:
+            del self._versions[key]
+        self._last_access.pop(thread_id, None)
+        self._thread_bytes.pop(thread_id, None)
+        if (table := _message_table(self)) is not None:
+            table.delete_thread((self.name or "", thread_id))
+        if self.name:
+            blob_store.delete_thread(self.name, thread_id)
+        logger.debug(f"Dropped checkpoints of thread {thread_id}")
+
+    def _track_reads(self, tuples: list[CheckpointTuple]):
+        # InMemorySaver.writes is a defaultdict, so reads may create empty write entries
+        for item in tuples:
+            configurable = item.config["configurable"]
+            key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"])
+            if key in self.writes:
+                self._write_keys.setdefault(key[0], set()).add(key)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            with thread_scope(self.name, thread_id):
+                result = super().get_tuple(config)
+            if result is not None:
+                self._track_reads([result])
+            return result
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Materialized under the lock so eviction cannot run mid-iteration
+        with self._lock:
+            if config:
+                thread_id = config["configurable"]["thread_id"]
+                if thread_id not in self.storage:
+                    return iter(())
+                with thread_scope(self.name, thread_id):
+                    items = list(super().list(config, filter=filter, before=before, limit=limit))
+            else:
+                # One scope per thread; InMemorySaver lists threads in storage order
+                items = []
+                for thread_id in list(self.storage):
+                    remaining = None if limit is None else limit - len(items)
+                    if remaining == 0:
+                        break
+                    with thread_scope(self.name, thread_id):
+                        items.extend(super().list(
+                            {"configurable": {"thread_id": thread_id}}, filter=filter, before=before, limit=remaining
+                        ))
+            self._track_reads(items)
+        return iter(items)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            with thread_scope(self.name, thread_id):
+                result = super().put(config, checkpoint, metadata, new_versions)
+
+            self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+            self._blob_keys.setdefault(thread_id, set()).update(
+                (thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()
+            )
+
+            self._prune(thread_id, checkpoint_ns)
+            self._touch(thread_id)
+            self._measure(thread_id)
+            self._evict(thread_id)
+            return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            with thread_scope(self.name, thread_id):
+                super().put_writes(config, writes, task_id, task_path)
+
+            self._write_keys.setdefault(thread_id, set()).add(
+                (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            )
+            self._touch(thread_id)
+            self._measure(thread_id)
+            self._evict(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop_thread(thread_id)
+
+    def stats(self) -> dict:
+        """Thread count, bytes held and eviction counters."""
+        with self._lock:
+            return {
+                **self._stats,
+                "threads": len(self._last_access),
+                "bytes": sum(self._thread_bytes.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+class BoundedSqliteSaver(SqliteSaver):
+    """
+    LangGraph's SqliteSaver with per-thread checkpoint retention, an idle
+    TTL and the cleanup of a thread's message table and blob_store payloads.
+
+    The database runs in WAL mode, so several processes on one host can share
+    it. Older checkpoints beyond keep_checkpoints are deleted on write, and
+    threads idle longer than ttl are purged periodically. SqliteSaver only
+    implements the sync methods; the async ones run them in a worker thread.
+
+    Args:
+        conn: Connection to the database file
+        ttl: Seconds a thread may stay idle before it is purged, or None
+        keep_checkpoints: Checkpoints retained per thread and namespace, or None for all
+        name: Graph name; when set, the thread's blob_store payloads are
+              deleted together with its checkpoints
+    """
+
+    PURGE_INTERVAL = 300.0
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        ttl: Optional[float] = None,
+        keep_checkpoints: Optional[int] = 1,
+        name: Optional[str] = None,
+        **kwargs,
+    ):
+        super().__init__(conn, **kwargs)
+        self.name = name
+        self.ttl = ttl
+        self.keep_checkpoints = keep_checkpoints
+        self._last_purge = 0.0
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        # Last write per thread, for the idle TTL
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        with thread_scope(self.name, config["configurable"]["thread_id"]):
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config:
+            with thread_scope(self.name, config["configurable"]["thread_id"]):
+                return iter(list(super().list(config, filter=filter, before=before, limit=limit)))
+
+        # One scope per thread, as the message table is scoped per thread
+        with self.cursor(transaction=False) as cur:
+            thread_ids = [thread_id for (thread_id,) in cur.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+        items = []
+        for thread_id in thread_ids:
+            remaining = None if limit is None else limit - len(items)
+            if remaining == 0:
+                break
+            with thread_scope(self.name, thread_id):
+                items.extend(super().list(
+                    {"configurable": {"thread_id": thread_id}}, filter=filter, before=before, limit=remaining
+                ))
+        return iter(items)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with thread_scope(self.name, thread_id):
+            result = super().put(config, checkpoint, metadata, new_versions)
+
+        with self.cursor() as cur:
+            cur.execute("INSERT OR REPLACE INTO thread_activity VALUES (?, ?)", (thread_id, time.time()))
+            if self.keep_checkpoints is not None:
+                stale = [
+                    (thread_id, checkpoint_ns, checkpoint_id) for (checkpoint_id,) in cur.execute(
+                        "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                        "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                        (thread_id, checkpoint_ns, self.keep_checkpoints),
+                    ).fetchall()
+                ]
+                for table in ("checkpoints", "writes"):
+                    cur.executemany(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", stale
+                    )
+
+        self._maybe_purge()
+        return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with thread_scope(self.name, config["configurable"]["thread_id"]):
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute("DELETE FROM thread_activity WHERE thread_id = ?", (str(thread_id),))
+        self._drop_thread_data(thread_id)
+
+    def _drop_thread_data(self, thread_id: str):
+        if (table := _message_table(self)) is not None:
+            table.delete_thread((self.name or "", thread_id))
+        if self.name:
+            blob_store.delete_thread(self.name, thread_id)
+
+    def _maybe_purge(self):
+        """Delete threads idle for longer than ttl, at most every PURGE_INTERVAL seconds."""
+        now = time.time()
+        if self.ttl is None or now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+
+        with self.cursor() as cur:
+            idle = [
+                (thread_id,) for (thread_id,) in cur.execute(
+                    "SELECT thread_id FROM thread_activity WHERE updated_at < ?", (now - self.ttl,)
+                ).fetchall()
+            ]
+            for table in ("checkpoints", "writes", "thread_activity"):
+                cur.executemany(f"DELETE FROM {table} WHERE thread_id = ?", idle)
+
+        for (thread_id,) in idle:
+            self._drop_thread_data(thread_id)
+        if idle:
+            logger.info(f"Purged {len(idle)} idle threads of the {self.name} checkpoints")
+
+    def stats(self) -> dict:
+        """Thread count and database size."""
+        with self.cursor(transaction=False) as cur:
+            threads = cur.execute("SELECT COUNT(*) FROM thread_activity").fetchone()[0]
+            path = cur.execute("PRAGMA database_list").fetchone()[2]
+        size = sum(os.path.getsize(path + suffix) for suffix in ("", "-wal") if os.path.exists(path + suffix))
+        return {"threads": threads, "bytes": size}
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _serializer(table_factory: Callable[[], Any]) -> Optional[CompactSerializer]:
+    """Configured checkpoint serializer, or None for LangGraph's default."""
+    if settings.checkpoint_serializer == "jsonplus":
+        return None
+    if settings.checkpoint_serializer != "compact":
+        raise ValueError(
+            f"Unknown checkpoint serializer '{settings.checkpoint_serializer}', expected 'compact' or 'jsonplus'"
+        )
+    return CompactSerializer(table_factory(), compress_min_bytes=settings.checkpoint_compress_min_bytes)
+
+
+def _memory_checkpointer(name: str) -> BaseCheckpointSaver:
+    return BoundedInMemorySaver(
+        ttl=settings.checkpoint_ttl,
+        max_bytes=settings.checkpoint_max_bytes,
+        keep_checkpoints=settings.checkpoint_keep_per_thread,
+        name=name,
+        serde=_serializer(InMemoryMessageTable),
+    )
+
+
+def _sqlite_checkpointer(name: str) -> BaseCheckpointSaver:
+    path = os.path.join(settings.checkpoint_dir, f"{name}.sqlite")
+    os.makedirs(settings.checkpoint_dir, exist_ok=True)
+    return BoundedSqliteSaver(
+        sqlite3.connect(path, check_same_thread=False, timeout=30),
+        ttl=settings.checkpoint_ttl,
+        keep_checkpoints=settings.checkpoint_keep_per_thread,
+        name=name,
+        serde=_serializer(lambda: SqliteMessageTable(path)),
+    )
+
+
+# settings.checkpoint_backend -> factory taking the graph name
+CHECKPOINT_BACKENDS: dict[str, Callable[[str], BaseCheckpointSaver]] = {
+    "memory": _memory_checkpointer,
+    "sqlite": _sqlite_checkpointer,
+}
+
+
+def create_checkpointer(name: str) -> BaseCheckpointSaver:
+    """
+    Checkpointer for a compiled graph, using the configured backend.
+
+    Args:
+        name: Graph name; persistent backends keep each graph's threads
+              separate so thread_ids of different endpoints cannot collide
+    """
+    try:
+        factory = CHECKPOINT_BACKENDS[settings.checkpoint_backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown checkpoint backend '{settings.checkpoint_backend}', "
+            f"expected one of {sorted(CHECKPOINT_BACKENDS)}"
+        )
+    return factory(name)
@@ -0,0 +1,342 @@
+"""
+Persistent cache of document embeddings.
+
+Vectors are stored as raw float32 rows in one file per (model, dimension)
+and read back through a memory map; a SQLite table maps the SHA-256 of each
+text to its row. A 3072-d text-embedding-3-large vector therefore costs
+12 KB on disk and no (de)serialization on a hit.
+
+Row numbers are allocated inside a SQLite write transaction and the vector
+is written before the transaction commits, so several worker processes can
+share the same cache directory safely.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Keys per IN (...) query, below SQLite's host parameter limit
+SQLITE_BATCH = 500
+
+MODEL_DIMENSIONS = {
+    "text-embedding-3-large": 3072,
+    "text-embedding-3-small": 1536,
+    "text-embedding-ada-002": 1536,
+}
+
+
+class EmbeddingStore:
+    """
+    SQLite index plus memory-mapped float32 matrix for one model/dimension.
+
+    Args:
+        directory: Cache directory
+        model: Embedding model name
+        dimension: Vector dimension
+    """
+
+    def __init__(self, directory: str, model: str, dimension: int):
+        os.makedirs(directory, exist_ok=True)
+        self.model = model
+        self.dimension = dimension
+        self._row_bytes = dimension * 4
+
+        name = f"{model}-{dimension}"
+        self._vectors_path = os.path.join(directory, f"{name}.f32")
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            os.path.join(directory, f"{name}.sqlite"),
+            check_same_thread=False,
+            timeout=30,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+
+        # Opened read-write for pwrite; the memmap is (re)created on demand
+        self._fd = os.open(self._vectors_path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._mmap: Optional[np.memmap] = None
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _vectors(self, min_rows: int) -> np.ndarray:
+        if self._mmap is None or self._mmap.shape[0] < min_rows:
+            rows = os.fstat(self._fd).st_size // self._row_bytes
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimension))
+        return self._mmap
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Return the cached vectors for the given keys (missing keys are omitted)."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_BATCH):
+                batch = keys[start:start + SQLITE_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                if not rows:
+                    continue
+                vectors = self._vectors(max(row for _, row in rows) + 1)
+                for key, row in rows:
+                    found[key] = np.array(vectors[row])
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        """Append vectors for new keys; keys already present are skipped."""
+        if not items:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                keys = list(items)
+                existing = set()
+                for start in range(0, len(keys), SQLITE_BATCH):
+                    batch = keys[start:start + SQLITE_BATCH]
+                    existing.update(
+                        key for (key,) in self._conn.execute(
+                            f"SELECT key FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                        )
+                    )
+                next_row = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings").fetchone()[0]
+                for key, vector in items.items():
+                    if key in existing:
+                        continue
+                    data = np.asarray(vector, dtype=np.float32)
+                    if data.shape != (self.dimension,):
+                        raise ValueError(f"Expected {self.dimension}-d vector, got {data.shape}")
+                    os.pwrite(self._fd, data.tobytes(), next_row * self._row_bytes)
+                    self._conn.execute("INSERT INTO embeddings (key, row) VALUES (?, ?)", (key, next_row))
+                    next_row += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+_stores: dict[tuple[str, int], EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(model: str, dimension: int) -> EmbeddingStore:
+    """Process-wide EmbeddingStore for a model/dimension pair."""
+    with _stores_lock:
+        store = _stores.get((model, dimension))
+        if store is None:
+            store = _stores[(model, dimension)] = EmbeddingStore(settings.embedding_cache_dir, model, dimension)
+        return store
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key normalization for Turkish queries: NFC, Turkish dotted/dotless
+    i casefolding and collapsed whitespace.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("İ", "i").replace("I", "ı").lower()
+    return " ".join(text.split())
+
+
+class QueryEmbeddingCache:
+    """
+    In-process LRU of query embeddings with an optional TTL.
+
+    Args:
+        max_entries: Number of query vectors kept
+        ttl: Seconds an entry stays valid, or None to keep until evicted
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, list[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[list[float]]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and (self.ttl is None or time.monotonic() - item[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return item[1]
+
+            if item is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, vector: list[float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+_query_caches: dict[tuple[str, int], QueryEmbeddingCache] = {}
+
+
+def get_query_cache(model: str, dimension: int) -> QueryEmbeddingCache:
+    """Process-wide query embedding LRU for a model/dimension pair."""
+    with _stores_lock:
+        cache = _query_caches.get((model, dimension))
+        if cache is None:
+            cache = _query_caches[(model, dimension)] = QueryEmbeddingCache(
+                settings.query_embedding_cache_size,
+                settings.query_embedding_cache_ttl,
+            )
+        return cache
+
+
+def query_cache_stats() -> dict:
+    """Stats of the process-wide query embedding LRUs, keyed by "model/dimension"."""
+    with _stores_lock:
+        caches = dict(_query_caches)
+    return {f"{model}/{dimension}": cache.stats() for (model, dimension), cache in caches.items()}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves embed_documents from an EmbeddingStore
+    and only sends texts it has not seen before to the wrapped model.
+
+    Query embeddings go through an in-process LRU keyed by the normalized
+    query, so repeated questions skip the embedding round trip.
+    """
+
+    def __init__(self, underlying: Embeddings, store: EmbeddingStore, query_cache: Optional[QueryEmbeddingCache] = None):
+        self.underlying = underlying
+        self.store = store
+        self.query_cache = query_cache
+        self._stats_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _lookup(self, texts: list[str]) -> tuple[list[str], dict[str, np.ndarray], list[tuple[str, str]]]:
+        keys = [self.store.key(text) for text in texts]
+        found = self.store.get_many(list(set(keys)))
+
+        missing = {}
+        misses = 0
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing[key] = text
+                misses += 1
+
+        with self._stats_lock:
+            self._stats["hits"] += len(texts) - misses
+            self._stats["misses"] += misses
+
+        return keys, found, list(missing.items())
+
+    @staticmethod
+    def _assemble(keys: list[str], found: dict) -> list[list[float]]:
+        return [found[key].tolist() for key in keys]
+
+    def _store_new(self, missing: list, vectors: list[list[float]], found: dict):
+        new_items = {key: vector for (key, _), vector in zip(missing, vectors)}
+        self.store.put_many(new_items)
+        for key, vector in new_items.items():
+            found[key] = np.asarray(vector, dtype=np.float32)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = self.underlying.embed_documents([text for _, text in missing])
+            self._store_new(missing, vectors, found)
+        return self._assemble(keys, found)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys, found, missing = await asyncio.to_thread(self._lookup, texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents([text for _, text in missing])
+            await asyncio.to_thread(self._store_new, missing, vectors, found)
+        return self._assemble(keys, found)
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.query_cache is None:
+            return self.underlying.embed_query(text)
+
+        key = normalize_query(text)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self.query_cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        if self.query_cache is None:
+            return await self.underlying.aembed_query(text)
+
+        key = normalize_query(text)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            self.query_cache.put(key, vector)
+        return vector
+
+    def stats(self) -> dict:
+        """Hit/miss counts of embed_documents texts and of the query LRU."""
+        with self._stats_lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            stats = {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / total if total else 0.0,
+                "cached_vectors": self.store.count(),
+            }
+        if self.query_cache is not None:
+            stats["query_cache"] = self.query_cache.stats()
+        return stats
+
+
+def cached_openai_embeddings(model: str = "text-embedding-3-large", dimensions: Optional[int] = None, **kwargs) -> CachedEmbeddings:
+    """
+    Create OpenAIEmbeddings wrapped with the persistent embedding cache.
+
+    Args:
+        model: OpenAI embedding model
+        dimensions: Output dimension; defaults to the model's native size
+        **kwargs: Passed to OpenAIEmbeddings (e.g. openai_api_key)
+    """
+    dimension = dimensions or MODEL_DIMENSIONS[model]
+    if dimensions is not None:
+        kwargs["dimensions"] = dimensions
+
+    underlying = OpenAIEmbeddings(model=model, **kwargs)
+    return CachedEmbeddings(
+        underlying,
+        get_embedding_store(model, dimension),
+        get_query_cache(model, dimension),
+    )
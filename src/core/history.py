@@ -0,0 +1,130 @@
+"""
+History compaction for the create_agent subagents.
+
+The subagents see the whole orchestrator thread, so every earlier tool
+output (announcement lists, PDF splits, regulation search results) would be
+resent to the model on every later call. ToolHistoryCompaction rewrites the
+messages of each model request, leaving the checkpointed history unchanged:
+
+1. Tool outputs from earlier turns (before the latest user message) are
+   replaced by a short digest naming the tool call and how to get the
+   content back: calling the tool again, which is cheap because pages, PDF
+   splits and query embeddings are cached.
+2. If the messages still exceed max_prompt_tokens, the oldest turns are
+   dropped, then tool outputs of the current turn other than the newest
+   are digested too.
+
+A turn starts at a user message, so tool calls and their results are never
+separated.
+"""
+
+import json
+import logging
+from typing import Awaitable, Callable
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from core.tokens import count_message_tokens, message_text
+
+logger = logging.getLogger(__name__)
+
+
+class ToolHistoryCompaction(AgentMiddleware):
+    """
+    Replace stale tool outputs with digests and cap the prompt size.
+
+    Args:
+        max_prompt_tokens: Cap for the conversation messages sent to the model
+                           (system prompt and tool schemas excluded)
+        digest_chars: Characters of the original output kept in a digest
+    """
+
+    def __init__(self, max_prompt_tokens: int, digest_chars: int = 200):
+        super().__init__()
+        self.max_prompt_tokens = max_prompt_tokens
+        self.digest_chars = digest_chars
+
+    def _digest(self, message: ToolMessage, messages: list[BaseMessage]) -> ToolMessage:
+        if message.response_metadata.get("compacted"):
+            return message
+
+        call = next(
+            (
+                call
+                for ai_message in messages if isinstance(ai_message, AIMessage)
+                for call in ai_message.tool_calls if call.get("id") == message.tool_call_id
+            ),
+            None,
+        )
+        name = message.name or (call["name"] if call else "tool")
+        args = json.dumps(call["args"], ensure_ascii=False) if call else ""
+
+        text = message_text(message)
+        preview = " ".join(text[:self.digest_chars].split())
+        content = (
+            f"[{name}({args}) sonucu önceki bir turdan, {len(text)} karakter; kısaltıldı. "
+            f"İçerik gerekirse aracı aynı argümanlarla tekrar çağır. Başlangıcı: {preview}…]"
+        )
+        return message.model_copy(update={
+            "content": content,
+            "artifact": None,
+            "response_metadata": {**message.response_metadata, "compacted": True},
+        })
+
+    def compact(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        """Compacted copy of the messages of a model request."""
+        turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        current = turn_starts[-1] if turn_starts else 0
+
+        compacted = [
+            self._digest(message, messages) if isinstance(message, ToolMessage) and i < current else message
+            for i, message in enumerate(messages)
+        ]
+        tokens = count_message_tokens(compacted)
+
+        # Drop whole turns, oldest first, keeping the current one
+        dropped = 0
+        for start in turn_starts[1:]:
+            if tokens <= self.max_prompt_tokens:
+                break
+            tokens -= count_message_tokens(compacted[dropped:start])
+            dropped = start
+        compacted = compacted[dropped:]
+
+        if tokens > self.max_prompt_tokens:
+            tool_indices = [i for i, message in enumerate(compacted) if isinstance(message, ToolMessage)]
+            for i in tool_indices[:-1]:
+                if tokens <= self.max_prompt_tokens:
+                    break
+                digest = self._digest(compacted[i], compacted)
+                tokens += count_message_tokens([digest]) - count_message_tokens([compacted[i]])
+                compacted[i] = digest
+
+        return compacted
+
+    def _request(self, request: ModelRequest) -> ModelRequest:
+        if not request.messages:
+            return request
+
+        messages = self.compact(request.messages)
+        if len(messages) != len(request.messages) or any(a is not b for a, b in zip(messages, request.messages)):
+            logger.info(
+                f"Compacted agent history: {len(request.messages)} -> {len(messages)} messages, "
+                f"{count_message_tokens(messages)} tokens"
+            )
+        return request.override(messages=messages)
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        return handler(self._request(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        return await handler(self._request(request))
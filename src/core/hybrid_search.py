@@ -0,0 +1,305 @@
+"""
+Hybrid dense + BM25 retrieval on the Qdrant collections.
+
+Each point carries its dense embedding and a BM25 sparse vector
+(core.sparse) under settings.sparse_vector_name. A search prefetches
+candidates from both and fuses them server-side with Reciprocal Rank
+Fusion, so exact terms ("madde 12", "AGNO") are found even when the dense
+neighbours miss them.
+
+Collections created before hybrid search have no sparse vector; for them
+HybridSearch falls back to the store's dense search until they are
+migrated with src/scripts/migrate_hybrid_collection.py.
+
+mmr_search returns a diverse top k instead: one Qdrant call fetches a
+candidate pool together with the dense vectors, and Maximal Marginal
+Relevance is computed locally with NumPy, without embedding anything again.
+
+Dense searches on quantized collections (core.quantization) oversample the
+compressed vectors and rescore the candidates with the originals.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_qdrant import QdrantVectorStore
+from qdrant_client import models
+
+from core.quantization import collection_quantization, quantization_search_params
+from core.sparse import TurkishBM25
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TYPES = ("similarity", "mmr")
+
+
+def maximal_marginal_relevance(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """
+    Indices of k candidates chosen by MMR.
+
+    Args:
+        query: Query vector, shape (d,)
+        candidates: Candidate vectors, shape (n, d), most relevant first
+        k: Number of candidates to select
+        lambda_mult: 1 ranks by relevance only, 0 by diversity only
+    """
+    if len(candidates) == 0:
+        return []
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(np.linalg.norm(query), 1e-12)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to the selection so far
+    redundancy = similarity[selected[0]].copy()
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
+
+
+class HybridSearch:
+    """
+    Dense + sparse search with RRF fusion over a QdrantVectorStore's collection.
+
+    Args:
+        store: Dense vector store of the collection (embeddings, client, payload keys)
+        sparse: Sparse encoder
+        sparse_vector_name: Name of the sparse vector in the collection
+        prefetch_limit: Candidates fetched from each side before fusion
+        enabled: False to always use dense search
+        oversampling: Candidates per result rescored on quantized collections;
+            None for the quantization's default
+        rescore: Rescore quantized candidates with the original vectors
+    """
+
+    def __init__(
+        self,
+        store: QdrantVectorStore,
+        sparse: TurkishBM25,
+        sparse_vector_name: str,
+        prefetch_limit: int = 40,
+        enabled: bool = True,
+        oversampling: Optional[float] = None,
+        rescore: bool = True,
+    ):
+        self.store = store
+        self.sparse = sparse
+        self.sparse_vector_name = sparse_vector_name
+        self.prefetch_limit = prefetch_limit
+        self.enabled = enabled
+        self.oversampling = oversampling
+        self.rescore = rescore
+        self._available: Optional[bool] = None
+        self._search_params: Optional[models.SearchParams] = None
+        self._lock = threading.Lock()
+
+    def _inspect(self) -> bool:
+        """Read the sparse vector and quantization setup of the collection; once per process."""
+        if self._available is None:
+            with self._lock:
+                if self._available is None:
+                    try:
+                        info = self.store.client.get_collection(self.store.collection_name)
+                    except Exception as e:
+                        logger.warning(f"Could not inspect collection {self.store.collection_name}: {e}")
+                        return False
+
+                    quantization = collection_quantization(info, self.store.vector_name)
+                    self._search_params = quantization_search_params(quantization, self.oversampling, self.rescore)
+                    if self._search_params is not None:
+                        logger.info(
+                            f"Collection {self.store.collection_name} uses {quantization} quantization, "
+                            f"oversampling {self._search_params.quantization.oversampling}"
+                        )
+
+                    has_sparse = self.sparse_vector_name in (info.config.params.sparse_vectors or {})
+                    if self.enabled and not has_sparse:
+                        logger.warning(
+                            f"Collection {self.store.collection_name} has no sparse vector "
+                            f"'{self.sparse_vector_name}', using dense search"
+                        )
+                    self._available = has_sparse
+        return True
+
+    def available(self) -> bool:
+        """Whether the collection has the sparse vector; checked once per process."""
+        return self.enabled and self._inspect() and self._available
+
+    @property
+    def search_params(self) -> Optional[models.SearchParams]:
+        """Quantization search parameters of the dense vector, None if it is not quantized."""
+        self._inspect()
+        return self._search_params
+
+    def _to_document(self, point: models.ScoredPoint) -> Document:
+        payload = point.payload or {}
+        metadata = payload.get(self.store.metadata_payload_key) or {}
+        metadata["_id"] = point.id
+        metadata["_collection_name"] = self.store.collection_name
+        return Document(page_content=payload.get(self.store.content_payload_key, ""), metadata=metadata)
+
+    def _points(
+        self,
+        dense: list[float],
+        query: str,
+        k: int,
+        filter: Optional[models.Filter],
+        with_vectors: bool = False,
+    ) -> list[models.ScoredPoint]:
+        sparse = self.sparse.embed_query(query)
+        limit = max(self.prefetch_limit, k)
+
+        return self.store.client.query_points(
+            collection_name=self.store.collection_name,
+            prefetch=[
+                models.Prefetch(
+                    query=dense,
+                    using=self.store.vector_name or None,
+                    filter=filter,
+                    params=self.search_params,
+                    limit=limit,
+                ),
+                models.Prefetch(
+                    query=models.SparseVector(indices=sparse.indices, values=sparse.values),
+                    using=self.sparse_vector_name,
+                    filter=filter,
+                    limit=limit,
+                ),
+            ],
+            query=models.FusionQuery(fusion=models.Fusion.RRF),
+            limit=k,
+            with_payload=True,
+            with_vectors=with_vectors,
+        ).points
+
+    def _query(
+        self,
+        dense: list[float],
+        query: str,
+        k: int,
+        filter: Optional[models.Filter],
+    ) -> list[tuple[Document, float]]:
+        return [(self._to_document(point), point.score) for point in self._points(dense, query, k, filter)]
+
+    def _dense_vector(self, point: models.ScoredPoint) -> list[float]:
+        if isinstance(point.vector, dict):
+            return point.vector[self.store.vector_name]
+        return point.vector
+
+    def _mmr(
+        self,
+        dense: list[float],
+        query: str,
+        k: int,
+        filter: Optional[models.Filter],
+        fetch_k: int,
+        lambda_mult: float,
+    ) -> list[tuple[Document, float]]:
+        fetch_k = max(fetch_k, k)
+        if self.available():
+            pool = self._points(dense, query, fetch_k, filter, with_vectors=True)
+        else:
+            pool = self.store.client.query_points(
+                collection_name=self.store.collection_name,
+                query=dense,
+                using=self.store.vector_name or None,
+                query_filter=filter,
+                search_params=self.search_params,
+                limit=fetch_k,
+                with_payload=True,
+                with_vectors=True,
+            ).points
+
+        if not pool:
+            return []
+
+        vectors = np.asarray([self._dense_vector(point) for point in pool], dtype=np.float32)
+        chosen = maximal_marginal_relevance(np.asarray(dense, dtype=np.float32), vectors, k, lambda_mult)
+        logger.debug(f"MMR picked {chosen} from {len(pool)} candidates")
+        return [(self._to_document(pool[i]), pool[i].score) for i in chosen]
+
+    def search(self, query: str, k: int, filter: Optional[models.Filter] = None) -> list[tuple[Document, float]]:
+        """
+        Top k documents with their scores: RRF scores when hybrid, the
+        store's similarity scores when falling back to dense search.
+        """
+        if not self.available():
+            return self.store.similarity_search_with_score(
+                query, k=k, filter=filter, search_params=self.search_params
+            )
+        return self._query(self.store.embeddings.embed_query(query), query, k, filter)
+
+    async def asearch(self, query: str, k: int, filter: Optional[models.Filter] = None) -> list[tuple[Document, float]]:
+        """Async variant of search."""
+        if not await asyncio.to_thread(self.available):
+            return await self.store.asimilarity_search_with_score(
+                query, k=k, filter=filter, search_params=self.search_params
+            )
+        dense = await self.store.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._query, dense, query, k, filter)
+
+    def mmr_search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[models.Filter] = None,
+        fetch_k: int = 30,
+        lambda_mult: float = 0.5,
+    ) -> list[tuple[Document, float]]:
+        """
+        Diverse top k: MMR over the fetch_k best hybrid (or dense) candidates.
+
+        Scores are those of the candidate search; results are in MMR order.
+        """
+        return self._mmr(self.store.embeddings.embed_query(query), query, k, filter, fetch_k, lambda_mult)
+
+    async def ammr_search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[models.Filter] = None,
+        fetch_k: int = 30,
+        lambda_mult: float = 0.5,
+    ) -> list[tuple[Document, float]]:
+        """Async variant of mmr_search."""
+        dense = await self.store.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self._mmr, dense, query, k, filter, fetch_k, lambda_mult)
+
+    def add_sparse_vectors(self, ids: Sequence, texts: Sequence[str]):
+        """Attach sparse vectors to points just added through the dense store."""
+        if not self.available() or not ids:
+            return
+        vectors = self.sparse.embed_documents(list(texts))
+        self.store.client.update_vectors(
+            collection_name=self.store.collection_name,
+            points=[
+                models.PointVectors(
+                    id=point_id,
+                    vector={self.sparse_vector_name: models.SparseVector(indices=v.indices, values=v.values)},
+                )
+                for point_id, v in zip(ids, vectors)
+            ],
+        )
+
+
+def sparse_vectors_config(name: str) -> dict:
+    """sparse_vectors_config for collections searched with HybridSearch."""
+    return {name: models.SparseVectorParams(modifier=models.Modifier.IDF)}
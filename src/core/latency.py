@@ -0,0 +1,58 @@
+"""
+Per-call latency budget with a breakdown of where the time went.
+
+A LatencyBudget is created when a tool call starts. Every wait inside the
+call takes its timeout from the remaining budget and is recorded as a named
+step, so the tool can return the timing breakdown in its result metadata.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class LatencyBudget:
+    """
+    Deadline for a single tool call plus the duration of each named step.
+
+    Args:
+        seconds: Total time the call is allowed to take
+    """
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.started = time.perf_counter()
+        self.deadline = self.started + seconds
+        self.timings: dict[str, float] = {}
+
+    def remaining(self) -> float:
+        """Remaining budget in seconds (never negative)."""
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def remaining_ms(self) -> float:
+        """
+        Remaining budget in milliseconds, for Playwright timeouts.
+
+        Never returns 0, since Playwright treats a 0 timeout as "no timeout".
+        """
+        return max(1.0, self.remaining() * 1000)
+
+    def mark(self, name: str):
+        """Record the time elapsed since the call started as a step."""
+        self.timings[name] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    @contextmanager
+    def step(self, name: str):
+        """Record the duration of the wrapped block under the given name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def metadata(self) -> dict:
+        """Timing breakdown to attach to a tool result."""
+        return {
+            "budget_ms": round(self.budget * 1000, 1),
+            "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "timings_ms": dict(self.timings),
+        }
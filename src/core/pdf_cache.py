@@ -0,0 +1,150 @@
+"""
+Disk-backed, content-addressed cache of parsed and split PDF documents.
+
+Layout under the cache directory:
+    urls/<sha256(url)>.json               URL record: content hash + HTTP validators
+    chunks/<sha256(pdf)>.<variant>.json   Split chunks for one PDF body
+
+Chunks are keyed by the hash of the PDF bytes (plus the splitter variant),
+so the same file served under several URLs is parsed only once. URL records
+are served without network access for `fresh_for` seconds and revalidated
+with a conditional GET afterwards. When the chunk files exceed `max_bytes`
+the least recently used ones are deleted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+def _write_json_atomic(path: str, data) -> int:
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.path.getsize(path)
+
+
+class PdfChunkCache:
+    """
+    Disk cache of split PDF chunks, keyed by URL record and content hash.
+
+    Args:
+        directory: Cache root directory (created if missing)
+        variant: Identifies the splitter settings the chunks were made with
+        max_bytes: Size cap for all chunk files together
+        fresh_for: Seconds a URL record is trusted without revalidation
+    """
+
+    def __init__(self, directory: str, variant: str, max_bytes: int, fresh_for: float):
+        self.directory = directory
+        self.variant = variant
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+
+        self._urls_dir = os.path.join(directory, "urls")
+        self._chunks_dir = os.path.join(directory, "chunks")
+        os.makedirs(self._urls_dir, exist_ok=True)
+        os.makedirs(self._chunks_dir, exist_ok=True)
+
+        self._evict_lock = threading.Lock()
+        self._stats = {"hits": 0, "revalidated": 0, "content_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def _url_path(self, url: str) -> str:
+        return os.path.join(self._urls_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _chunks_path(self, content_hash: str) -> str:
+        return os.path.join(self._chunks_dir, f"{content_hash}.{self.variant}.json")
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Return the URL record (content_hash, etag, last_modified, checked_at) if any."""
+        try:
+            with open(self._url_path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, record: dict) -> bool:
+        return time.time() - record.get("checked_at", 0) < self.fresh_for
+
+    def remember(self, url: str, content_hash: str, etag: Optional[str], last_modified: Optional[str]):
+        """Write or refresh the URL record after a successful fetch or revalidation."""
+        _write_json_atomic(self._url_path(url), {
+            "url": url,
+            "content_hash": content_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": time.time(),
+        })
+
+    def load_chunks(self, content_hash: str) -> Optional[list[Document]]:
+        path = self._chunks_path(content_hash)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # Mark as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in data]
+
+    def store_chunks(self, content_hash: str, chunks: list[Document]):
+        _write_json_atomic(
+            self._chunks_path(content_hash),
+            [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in chunks]
+        )
+        self._evict()
+
+    def record(self, outcome: str):
+        """Count a lookup outcome: hits, revalidated, content_hits or misses."""
+        self._stats[outcome] += 1
+
+    def _evict(self):
+        with self._evict_lock:
+            files = []
+            total = 0
+            for entry in os.scandir(self._chunks_dir):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    self._stats["evictions"] += 1
+                except OSError as e:
+                    logger.debug(f"Could not evict {path}: {e}")
+
+    def stats(self) -> dict:
+        return dict(self._stats)
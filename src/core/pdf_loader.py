@@ -0,0 +1,46 @@
+"""
+In-memory PDF loading shared by the ingestion paths.
+
+PyPDFLoader only accepts a file path, so callers used to write every PDF to
+a NamedTemporaryFile first. load_pdf parses bytes or any seekable file-like
+object (e.g. an UploadFile's underlying file) with the same PyPDFParser, so
+the resulting Documents and metadata are unchanged.
+"""
+
+import contextlib
+import io
+from typing import Any, BinaryIO, Union
+
+from langchain_community.document_loaders.parsers import PyPDFParser
+from langchain_core.documents import Document
+from langchain_core.documents.base import Blob
+
+
+class _StreamBlob(Blob):
+    """Blob backed by an already open, seekable binary stream."""
+
+    stream: Any = None
+
+    @contextlib.contextmanager
+    def as_bytes_io(self):
+        self.stream.seek(0)
+        yield self.stream
+
+
+def load_pdf(data: Union[bytes, BinaryIO], source: str) -> list[Document]:
+    """
+    Parse a PDF into one Document per page without touching the disk.
+
+    Args:
+        data: PDF bytes or a seekable binary file-like object. File objects
+              are read page by page by pypdf instead of into one buffer.
+        source: Value stored as metadata['source'] (file name or URL)
+
+    Returns:
+        List of page Documents, as PyPDFLoader would return them
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = io.BytesIO(data)
+
+    blob = _StreamBlob(path=source, stream=data)
+    return list(PyPDFParser().lazy_parse(blob))
@@ -0,0 +1,90 @@
+"""
+Vector quantization of the Qdrant collections.
+
+A quantized collection keeps a compressed copy of every dense vector in RAM
+and the float32 originals on disk. Searches walk the HNSW graph on the
+compressed vectors, fetch oversampling * k candidates and rescore them with
+the originals, so recall stays close to the unquantized search:
+
+    scalar  int8 per dimension, 4x smaller, oversampling 1.5
+    binary  1 bit per dimension, 32x smaller, oversampling 3.0; meant for
+            high-dimensional embeddings such as text-embedding-3-large
+
+Collections are quantized by src/scripts/create_collection.py
+(VECTOR_QUANTIZATION); the retrieval tools read the collection's
+configuration and pick the matching search parameters.
+"""
+
+from typing import Optional
+
+from qdrant_client import models
+
+QUANTIZATION_KINDS = ("none", "scalar", "binary")
+
+# Candidates fetched per requested result before rescoring
+DEFAULT_OVERSAMPLING = {"scalar": 1.5, "binary": 3.0, "product": 3.0}
+
+# Bytes per stored dimension
+BYTES_PER_DIMENSION = {"none": 4.0, "scalar": 1.0, "binary": 1 / 8}
+
+
+def quantization_config(kind: str, always_ram: bool = True) -> Optional[models.QuantizationConfig]:
+    """
+    Collection quantization_config for kind ("none", "scalar" or "binary").
+
+    Args:
+        kind: Quantization to apply
+        always_ram: Keep the quantized vectors in RAM while the originals stay on disk
+    """
+    if kind == "none":
+        return None
+    if kind == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                # Clip the 1% outliers so the int8 range covers the bulk of the values
+                quantile=0.99,
+                always_ram=always_ram,
+            )
+        )
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+    raise ValueError(f"Unknown quantization '{kind}', expected one of {QUANTIZATION_KINDS}")
+
+
+def collection_quantization(info: models.CollectionInfo, vector_name: str = "") -> str:
+    """Quantization kind of a collection's dense vector: "none", "scalar", "binary" or "product"."""
+    vectors = info.config.params.vectors
+    params = vectors.get(vector_name) if isinstance(vectors, dict) else vectors
+    config = (params.quantization_config if params else None) or info.config.quantization_config
+
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    if isinstance(config, models.ProductQuantization):
+        return "product"
+    return "none"
+
+
+def quantization_search_params(
+    kind: str,
+    oversampling: Optional[float] = None,
+    rescore: bool = True,
+) -> Optional[models.SearchParams]:
+    """
+    SearchParams for a collection quantized with kind, or None if it is not.
+
+    Args:
+        kind: Quantization of the collection (see collection_quantization)
+        oversampling: Candidates per result to rescore; None for the kind's default
+        rescore: Re-rank the candidates with the original vectors
+    """
+    if kind == "none":
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=rescore,
+            oversampling=oversampling or DEFAULT_OVERSAMPLING.get(kind, 2.0),
+        )
+    )
@@ -0,0 +1,226 @@
+"""
+Compact checkpoint serializer.
+
+CompactSerializer builds on LangGraph's JsonPlusSerializer (msgpack) and adds:
+
+- zstd compression of payloads and stored messages of at least
+  `compress_min_bytes`, when the zstandard package is installed;
+- message deduplication: lists of messages (the "messages" channel, message
+  writes, and message lists inside a checkpoint's channel_values) are
+  encoded as a list of content hashes, and each message is stored once per
+  thread in a MessageTable. Consecutive checkpoints of a conversation only
+  add the new messages instead of re-encoding the whole history.
+
+The table is scoped per thread so it can be dropped together with the
+thread's checkpoints. Savers establish the scope with thread_scope() around
+every serializer call; outside a scope messages are encoded inline.
+"""
+
+import contextlib
+import hashlib
+import sqlite3
+import threading
+from contextvars import ContextVar
+from typing import Any, Optional, Protocol
+
+import ormsgpack
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MESSAGE_REFS = "msgrefs"
+ZSTD_SUFFIX = "+zstd"
+# Placeholder for a deduplicated message list nested in a checkpoint's channel_values
+REFS_KEY = "__msgrefs__"
+
+_scope: ContextVar[Optional[tuple[str, str]]] = ContextVar("checkpoint_thread_scope", default=None)
+
+
+@contextlib.contextmanager
+def thread_scope(namespace: Optional[str], thread_id: Optional[str]):
+    """Scope serializer calls to one thread of one graph's checkpointer."""
+    token = _scope.set((namespace or "", thread_id) if thread_id is not None else None)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+class MessageTable(Protocol):
+    def get_many(self, scope: tuple[str, str], hashes: list[str]) -> dict[str, tuple[str, bytes]]: ...
+
+    def put_many(self, scope: tuple[str, str], items: dict[str, tuple[str, bytes]]) -> None: ...
+
+    def delete_thread(self, scope: tuple[str, str]) -> None: ...
+
+    def thread_bytes(self, scope: tuple[str, str]) -> int: ...
+
+
+class InMemoryMessageTable:
+    """Per-thread message table kept in process memory."""
+
+    def __init__(self):
+        self._threads: dict[tuple[str, str], dict[str, tuple[str, bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, scope, hashes):
+        with self._lock:
+            messages = self._threads.get(scope, {})
+            return {h: messages[h] for h in hashes if h in messages}
+
+    def put_many(self, scope, items):
+        with self._lock:
+            messages = self._threads.setdefault(scope, {})
+            for h, encoded in items.items():
+                messages.setdefault(h, encoded)
+
+    def delete_thread(self, scope):
+        with self._lock:
+            self._threads.pop(scope, None)
+
+    def thread_bytes(self, scope):
+        with self._lock:
+            return sum(len(data) for _, data in self._threads.get(scope, {}).values())
+
+
+class SqliteMessageTable:
+    """Per-thread message table stored next to the SqliteSaver tables."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "namespace TEXT NOT NULL, thread_id TEXT NOT NULL, hash TEXT NOT NULL, type TEXT, data BLOB, "
+            "PRIMARY KEY (namespace, thread_id, hash))"
+        )
+
+    def get_many(self, scope, hashes):
+        found = {}
+        unique = list(set(hashes))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, type, data FROM messages WHERE namespace = ? AND thread_id = ? "
+                    f"AND hash IN ({','.join('?' * len(batch))})",
+                    [*scope, *batch],
+                ).fetchall()
+                found.update({h: (type_, data) for h, type_, data in rows})
+        return found
+
+    def put_many(self, scope, items):
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO messages VALUES (?, ?, ?, ?, ?)",
+                [(*scope, h, type_, data) for h, (type_, data) in items.items()],
+            )
+
+    def delete_thread(self, scope):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE namespace = ? AND thread_id = ?", scope)
+
+    def thread_bytes(self, scope):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM messages WHERE namespace = ? AND thread_id = ?", scope
+            ).fetchone()[0]
+
+
+def _is_message_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, BaseMessage) for item in value)
+
+
+class CompactSerializer(JsonPlusSerializer):
+    """
+    JsonPlusSerializer with message deduplication and zstd compression.
+
+    Args:
+        table: Per-thread message table, or None to disable deduplication
+        compress_min_bytes: Compress encoded payloads at least this large
+        level: zstd compression level
+    """
+
+    def __init__(self, table: Optional[MessageTable] = None, compress_min_bytes: int = 4096, level: int = 3, **kwargs):
+        super().__init__(**kwargs)
+        self.table = table
+        self.compress_min_bytes = compress_min_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def _compress(self, type_: str, data: bytes) -> tuple[str, bytes]:
+        if self._compressor is not None and len(data) >= self.compress_min_bytes:
+            return type_ + ZSTD_SUFFIX, self._compressor.compress(data)
+        return type_, data
+
+    def _decompress(self, type_: str, data: bytes) -> tuple[str, bytes]:
+        if not type_.endswith(ZSTD_SUFFIX):
+            return type_, data
+        if self._decompressor is None:
+            raise RuntimeError("zstandard is required to read compressed checkpoints")
+        return type_[:-len(ZSTD_SUFFIX)], self._decompressor.decompress(data)
+
+    def _store_messages(self, scope: tuple[str, str], messages: list) -> list[str]:
+        hashes, new = [], {}
+        for message in messages:
+            type_, data = super().dumps_typed(message)
+            h = hashlib.sha256(data).hexdigest()[:32]
+            hashes.append(h)
+            new[h] = (type_, data)
+
+        stored = self.table.get_many(scope, list(new))
+        self.table.put_many(scope, {h: self._compress(*encoded) for h, encoded in new.items() if h not in stored})
+        return hashes
+
+    def _load_messages(self, scope: tuple[str, str], hashes: list[str]) -> list:
+        stored = self.table.get_many(scope, hashes)
+        missing = [h for h in hashes if h not in stored]
+        if missing:
+            raise KeyError(f"{len(missing)} deduplicated messages missing for thread {scope[1]}")
+        return [super(CompactSerializer, self).loads_typed(self._decompress(*stored[h])) for h in hashes]
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        scope = _scope.get() if self.table is not None else None
+
+        if scope is not None and _is_message_list(obj):
+            type_, data = MESSAGE_REFS, ormsgpack.packb(self._store_messages(scope, obj))
+        elif scope is not None and isinstance(obj, dict) and isinstance(obj.get("channel_values"), dict):
+            # Whole checkpoint (SqliteSaver): deduplicate message lists among its channel values
+            channel_values = {
+                key: {REFS_KEY: self._store_messages(scope, value)} if _is_message_list(value) else value
+                for key, value in obj["channel_values"].items()
+            }
+            type_, data = super().dumps_typed({**obj, "channel_values": channel_values})
+        else:
+            type_, data = super().dumps_typed(obj)
+
+        return self._compress(type_, data)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, data_ = self._decompress(*data)
+
+        if type_ == MESSAGE_REFS:
+            return self._load_messages(self._require_scope(), ormsgpack.unpackb(data_))
+
+        value = super().loads_typed((type_, data_))
+
+        if isinstance(value, dict) and isinstance(value.get("channel_values"), dict):
+            channel_values = value["channel_values"]
+            for key, item in channel_values.items():
+                if isinstance(item, dict) and REFS_KEY in item:
+                    channel_values[key] = self._load_messages(self._require_scope(), item[REFS_KEY])
+        return value
+
+    def _require_scope(self) -> tuple[str, str]:
+        scope = _scope.get()
+        if scope is None or self.table is None:
+            raise RuntimeError("Deduplicated messages can only be loaded inside thread_scope()")
+        return scope
@@ -0,0 +1,103 @@
+"""
+Local BM25 sparse vectors for Turkish text.
+
+Documents are encoded with the BM25 term-frequency component; Qdrant
+applies the IDF component server-side (sparse vector configured with
+Modifier.IDF), so no corpus statistics have to be kept here. Queries are
+encoded as the set of their terms.
+
+Tokenization is Turkish-aware:
+
+- Turkish casefolding (İ -> i, I -> ı) via normalize_query;
+- suffixes after an apostrophe are dropped ("AGNO'nun" -> "agno");
+- words are stemmed by truncation to their first five letters, which
+  works about as well as a morphological stemmer for Turkish retrieval
+  (Can et al., 2008) and needs no dictionary;
+- numbers are kept whole, and a word followed by a number also yields a
+  joint term ("madde 12" -> "madde#12"), so article references match
+  exactly.
+"""
+
+import re
+import zlib
+from collections import Counter
+
+from langchain_qdrant import SparseEmbeddings, SparseVector
+
+from core.embedding_cache import normalize_query
+
+TOKEN_PATTERN = re.compile(r"(\w+)(?:['’]\w+)?")
+
+STOPWORDS = frozenset("""
+acaba ama ancak artık aslında az bana bazı belki ben beni benim bir biri birkaç birşey biz bize bizi
+bu buna bunda bundan bunu bunun da daha de defa diye en gibi hem hep hepsi her hiç için ile ise
+kadar ki kim kime kimi mı mi mu mü nasıl ne neden nedir nelerdir nerede nereye niçin niye o olan
+olarak ona ondan onlar onu onun sanki siz şey şu tüm ve veya ya yani hangi olur olması
+the a an of and or to in on for is are what how
+""".split())
+
+PREFIX_LENGTH = 5
+
+
+def tokenize(text: str) -> list[str]:
+    """Terms of text: stemmed words, numbers and word#number pairs."""
+    terms = []
+    previous_word = None
+
+    for match in TOKEN_PATTERN.finditer(normalize_query(text)):
+        token = match.group(1).replace("_", "")
+        if not token:
+            continue
+
+        if token.isdigit():
+            terms.append(token)
+            if previous_word is not None:
+                terms.append(f"{previous_word}#{token}")
+            previous_word = None
+            continue
+
+        if token in STOPWORDS:
+            previous_word = None
+            continue
+
+        word = token if any(char.isdigit() for char in token) else token[:PREFIX_LENGTH]
+        terms.append(word)
+        previous_word = word
+
+    return terms
+
+
+def term_id(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & 0x7FFFFFFF
+
+
+class TurkishBM25(SparseEmbeddings):
+    """
+    BM25 sparse encoder for Qdrant collections with an IDF-modified sparse vector.
+
+    Args:
+        k1: Term frequency saturation
+        b: Document length normalization
+        avg_doc_length: Expected terms per document (1000-character chunks)
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 120.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def _document_vector(self, text: str) -> SparseVector:
+        terms = tokenize(text)
+        counts = Counter(term_id(term) for term in terms)
+        norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_doc_length)
+
+        indices = sorted(counts)
+        values = [counts[i] * (self.k1 + 1) / (counts[i] + norm) for i in indices]
+        return SparseVector(indices=indices, values=values)
+
+    def embed_documents(self, texts: list[str]) -> list[SparseVector]:
+        return [self._document_vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        indices = sorted({term_id(term) for term in tokenize(text)})
+        return SparseVector(indices=indices, values=[1.0] * len(indices))
@@ -0,0 +1,71 @@
+"""
+Token counting for prompt budgets.
+
+Counts with the tiktoken encoding of the chat model (o200k_base for
+gpt-4.1). tiktoken downloads the encoding on first use; if that fails the
+counts fall back to about four characters per token and a warning is
+logged once.
+"""
+
+import functools
+import json
+import logging
+from typing import Optional, Sequence
+
+import tiktoken
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+ENCODING = "o200k_base"
+# Role and separators the OpenAI chat format adds around every message
+MESSAGE_OVERHEAD = 4
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding() -> Optional[tiktoken.Encoding]:
+    try:
+        return tiktoken.get_encoding(ENCODING)
+    except Exception as e:
+        logger.warning(f"Could not load tiktoken encoding {ENCODING}, approximating token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_text(message: BaseMessage) -> str:
+    """Text the model sees for a message: its content plus any tool calls."""
+    if isinstance(message.content, str):
+        text = message.content
+    else:
+        text = "".join(
+            part if isinstance(part, str) else str(part.get("text", ""))
+            for part in message.content
+        )
+
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        text += json.dumps([{"name": call["name"], "args": call["args"]} for call in tool_calls], ensure_ascii=False)
+    return text
+
+
+def count_message_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(count_tokens(message_text(message)) + MESSAGE_OVERHEAD for message in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text that fits in max_tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
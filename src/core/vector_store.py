@@ -1,10 +1,13 @@
 import os
 
 from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings
+from core.embedding_cache import cached_openai_embeddings
+from core.hybrid_search import HybridSearch
+from core.sparse import TurkishBM25
+from settings import settings
 
 
-embeddings = OpenAIEmbeddings(
+embeddings = cached_openai_embeddings(
         model="text-embedding-3-large",
 )
 
@@ -18,4 +21,14 @@ store = QdrantVectorStore.from_existing_collection(
         api_key=qdrant_api_key,
 )
 
+search = HybridSearch(
+        store,
+        TurkishBM25(),
+        sparse_vector_name=settings.sparse_vector_name,
+        prefetch_limit=settings.hybrid_prefetch_limit,
+        enabled=settings.hybrid_search,
+        oversampling=settings.quantization_oversampling,
+        rescore=settings.quantization_rescore,
+)
+
 
@@ -1,31 +1,32 @@
+import io
 import os
 
 import requests
 from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-import tempfile
 
+from core.embedding_cache import cached_openai_embeddings
+from core.hybrid_search import HybridSearch
+from core.sparse import TurkishBM25
+from core.pdf_loader import load_pdf
 from settings import settings
 
 
-def download_pdf(url, temp_path):
-    """Download PDF from URL to temporary file"""
+def download_pdf(url):
+    """Download PDF from URL into an in-memory file object"""
     response = requests.get(url, stream=True ,verify=False)
     response.raise_for_status()
 
-    with open(temp_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    buffer = io.BytesIO()
+    for chunk in response.iter_content(chunk_size=8192):
+        buffer.write(chunk)
 
-    return temp_path
+    return buffer
 
 
-def load_and_split_pdf(pdf_path, chunk_size=1000, chunk_overlap=200):
-    """Load PDF and split into chunks"""
-    loader = PyPDFLoader(pdf_path)
-    documents = loader.load()
+def load_and_split_pdf(pdf, source, chunk_size=1000, chunk_overlap=200):
+    """Load PDF bytes or file object and split into chunks"""
+    documents = load_pdf(pdf, source=source)
 
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
@@ -56,7 +57,7 @@ def add_pdfs_to_vectorstore(pdf_urls, collection_name="school_data",
     # Strip whitespace from API key if provided
     if openai_api_key:
         openai_api_key = openai_api_key.strip()
-        embeddings = OpenAIEmbeddings(
+        embeddings = cached_openai_embeddings(
             model="text-embedding-3-large",
             openai_api_key=openai_api_key
         )
@@ -64,7 +65,7 @@ def add_pdfs_to_vectorstore(pdf_urls, collection_name="school_data",
         # If using environment variable, strip it
         import os
         api_key = os.getenv("OPENAI_API_KEY", "").strip()
-        embeddings = OpenAIEmbeddings(
+        embeddings = cached_openai_embeddings(
             model="text-embedding-3-large",
             openai_api_key=api_key
         )
@@ -85,17 +86,13 @@ def add_pdfs_to_vectorstore(pdf_urls, collection_name="school_data",
         print(f"Processing: {url}")
 
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                temp_path = tmp_file.name
-
             # Download PDF
             print("  Downloading...")
-            download_pdf(url, temp_path)
+            content = download_pdf(url)
 
             # Load and split PDF
             print("  Loading and splitting...")
-            documents = load_and_split_pdf(temp_path, chunk_size, chunk_overlap)
+            documents = load_and_split_pdf(content, url, chunk_size, chunk_overlap)
 
             # Add source URL to metadata
             for doc in documents:
@@ -107,16 +104,15 @@ def add_pdfs_to_vectorstore(pdf_urls, collection_name="school_data",
         except Exception as e:
             print(f"  ✗ Error processing {url}: {str(e)}")
 
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
     # Add all documents to vector store
     if all_documents:
         print(f"\nAdding {len(all_documents)} total chunks to vector store...")
-        qdrant.add_documents(all_documents)
+        ids = qdrant.add_documents(all_documents)
+        HybridSearch(qdrant, TurkishBM25(), settings.sparse_vector_name).add_sparse_vectors(
+            ids, [doc.page_content for doc in all_documents]
+        )
         print("✓ Successfully added all documents to Qdrant!")
+        print(f"Embedding cache: {embeddings.stats()}")
     else:
         print("No documents to add.")
 
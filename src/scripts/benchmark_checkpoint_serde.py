@@ -0,0 +1,189 @@
+"""
+Benchmark checkpoint serializers on orchestrator-like threads.
+
+Builds the orchestrator topology (router node -> create_agent subgraph with
+checkpointer=False, as in the app) with a scripted chat model. Turns
+alternate between the announcement agent (tool returning PDF splits) and the
+regulations agent (tool returning search results), so the thread grows the
+way real conversations do: a long message history with large tool outputs.
+
+Serializers compared:
+
+    jsonplus:       LangGraph's default (msgpack)
+    compact:        CompactSerializer, message deduplication only
+    compact+zstd:   CompactSerializer, deduplication and zstd from
+                    settings.checkpoint_compress_min_bytes (default 4096)
+
+For each turn it reports the bytes written (checkpoint blobs, writes and
+newly stored messages) and the serializer time per checkpoint step
+(dumps during the turn plus loading the latest checkpoint).
+
+Runs offline; no API keys are needed.
+
+Usage:
+    PYTHONPATH=src python src/scripts/benchmark_checkpoint_serde.py [turns]
+"""
+
+import sys
+import time
+from typing import Annotated, TypedDict
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph, add_messages
+
+from core.serde import CompactSerializer, InMemoryMessageTable, thread_scope
+
+TURNS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+THREAD_ID = "benchmark"
+
+# Roughly the size of one query_school_regulations result (5 chunks)
+REGULATION_PAYLOAD = "Madde 12 - (1) Mazeret sınavına girebilmek için ... " * 80
+# Roughly the size of the splits of a one-page announcement PDF
+ANNOUNCEMENT_PAYLOAD = "2025-2026 Güz yarıyılı final sınav programı ekte yer almaktadır. " * 120
+
+
+class MeasuredTable(InMemoryMessageTable):
+    """Message table that counts the bytes of newly stored messages."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_written = 0
+
+    def put_many(self, scope, items):
+        before = self.thread_bytes(scope)
+        super().put_many(scope, items)
+        self.bytes_written += self.thread_bytes(scope) - before
+
+
+def measured(serde_class):
+    class Measured(serde_class):
+        """Counts the bytes produced and the time spent in dumps/loads."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.bytes_written = 0
+            self.seconds = 0.0
+            self.steps = 0
+
+        def dumps_typed(self, obj):
+            start = time.perf_counter()
+            type_, data = super().dumps_typed(obj)
+            self.seconds += time.perf_counter() - start
+            self.bytes_written += len(data)
+            if isinstance(obj, dict) and "channel_versions" in obj:
+                self.steps += 1
+            return type_, data
+
+        def loads_typed(self, data):
+            start = time.perf_counter()
+            value = super().loads_typed(data)
+            self.seconds += time.perf_counter() - start
+            return value
+
+    return Measured
+
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    next_agent: str
+
+
+@tool
+def query_school_regulations(query: str) -> str:
+    """Search the school regulations."""
+    return REGULATION_PAYLOAD
+
+
+@tool
+def get_document_from_url(url: str) -> str:
+    """Fetch an announcement attachment."""
+    return ANNOUNCEMENT_PAYLOAD
+
+
+def scripted_replies(tool_name: str, argument: str):
+    turn = 0
+    while True:
+        turn += 1
+        yield AIMessage(
+            content="",
+            tool_calls=[{"name": tool_name, "args": {argument: f"soru {turn}"}, "id": f"{tool_name}_{turn}"}]
+        )
+        yield AIMessage(content=f"Bulduğum bilgilere göre cevap {turn}. " * 20)
+
+
+def build() -> StateGraph:
+    announcement_agent = create_agent(
+        model=ScriptedModel(messages=scripted_replies("get_document_from_url", "url")),
+        tools=[get_document_from_url],
+        checkpointer=False,
+    )
+    yonetmelik_agent = create_agent(
+        model=ScriptedModel(messages=scripted_replies("query_school_regulations", "query")),
+        tools=[query_school_regulations],
+        checkpointer=False,
+    )
+
+    def router(state: State) -> dict:
+        turn = sum(1 for message in state["messages"] if message.type == "human")
+        return {"next_agent": "announcement_agent" if turn % 2 else "yonetmelik_agent"}
+
+    workflow = StateGraph(State)
+    workflow.add_node("router", router)
+    workflow.add_node("announcement_agent", announcement_agent)
+    workflow.add_node("yonetmelik_agent", yonetmelik_agent)
+    workflow.add_edge(START, "router")
+    workflow.add_conditional_edges("router", lambda state: state["next_agent"], ["announcement_agent", "yonetmelik_agent"])
+    workflow.add_edge("announcement_agent", END)
+    workflow.add_edge("yonetmelik_agent", END)
+    return workflow
+
+
+def run(serde) -> list[tuple[int, float]]:
+    """Per turn: (bytes written, serializer ms per checkpoint step)."""
+    saver = InMemorySaver(serde=serde)
+    graph = build().compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": THREAD_ID}}
+    table = getattr(serde, "table", None)
+
+    per_turn = []
+    for turn in range(TURNS):
+        bytes_before, seconds_before, steps_before = serde.bytes_written, serde.seconds, serde.steps
+        table_before = table.bytes_written if table else 0
+
+        # The app's checkpointers set the scope around every call; here one thread runs at a time
+        with thread_scope("orchestrator", THREAD_ID):
+            graph.invoke({"messages": [{"role": "user", "content": f"Soru {turn}: sınav tarihleri ve şartları"}]}, config)
+            graph.get_state(config)
+
+        written = serde.bytes_written - bytes_before + (table.bytes_written - table_before if table else 0)
+        steps = max(serde.steps - steps_before, 1)
+        per_turn.append((written, (serde.seconds - seconds_before) * 1000 / steps))
+    return per_turn
+
+
+results = {
+    "jsonplus": run(measured(JsonPlusSerializer)()),
+    "compact": run(measured(CompactSerializer)(MeasuredTable(), compress_min_bytes=sys.maxsize)),
+    "compact+zstd": run(measured(CompactSerializer)(MeasuredTable(), compress_min_bytes=4096)),
+}
+
+print(f"{'turn':>4} " + " ".join(f"{name + ' bytes':>20} {'ms/step':>8}" for name in results))
+for turn, row in enumerate(zip(*results.values()), 1):
+    print(f"{turn:>4} " + " ".join(f"{written:>20,} {ms:>8.2f}" for written, ms in row))
+
+totals = {name: sum(written for written, _ in rows) for name, rows in results.items()}
+print(f"{'sum':>4} " + " ".join(f"{totals[name]:>20,} {'':>8}" for name in results))
+
+baseline = totals["jsonplus"]
+for name in ("compact", "compact+zstd"):
+    print(f"{name} writes {1 - totals[name] / baseline:.0%} fewer bytes than jsonplus")
@@ -0,0 +1,132 @@
+"""
+Compare dense-only and hybrid (dense + BM25, RRF) retrieval on a collection.
+
+Queries come from a JSONL file ({"query": ..., "relevant": [point ids]}) or,
+by default, are generated as known-item queries from a sample of the
+collection's chunks:
+
+    article:  "madde <n>" plus three long words of a chunk containing "MADDE <n>"
+    terms:    four long words of the chunk
+
+A query counts as a hit at k when one of its relevant points is among the
+top k. Both modes use the same precomputed query embedding, so the
+latencies compare the Qdrant queries alone.
+
+Usage:
+    PYTHONPATH=src python src/scripts/benchmark_hybrid_search.py [collection] [--queries file.jsonl] [--samples 100]
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+
+from langchain_qdrant import QdrantVectorStore
+
+from core.embedding_cache import cached_openai_embeddings
+from core.hybrid_search import HybridSearch
+from core.sparse import TurkishBM25
+from settings import settings
+
+KS = (1, 3, 5, 10)
+ARTICLE_PATTERN = re.compile(r"\bMADDE\s+(\d+)", re.IGNORECASE)
+
+parser = argparse.ArgumentParser()
+parser.add_argument("collection", nargs="?", default="school_data")
+parser.add_argument("--queries")
+parser.add_argument("--samples", type=int, default=100)
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+store = QdrantVectorStore.from_existing_collection(
+    embedding=cached_openai_embeddings(model="text-embedding-3-large"),
+    collection_name=args.collection,
+    url=settings.qdrant_url,
+    api_key=settings.qdrant_api_key,
+)
+search = HybridSearch(store, TurkishBM25(), settings.sparse_vector_name, settings.hybrid_prefetch_limit)
+if not search.available():
+    raise SystemExit(
+        f"Collection '{args.collection}' has no sparse vector; run src/scripts/migrate_hybrid_collection.py first"
+    )
+
+
+def long_words(text: str, count: int, rng: random.Random) -> list[str]:
+    words = sorted({word for word in re.findall(r"\w{7,}", text) if not word.isdigit()})
+    return rng.sample(words, min(count, len(words)))
+
+
+def synthetic_queries(samples: int) -> list[dict]:
+    rng = random.Random(args.seed)
+    points, _ = store.client.scroll(args.collection, limit=2000, with_payload=True, with_vectors=False)
+    queries = []
+    for point in rng.sample(points, min(samples, len(points))):
+        text = (point.payload or {}).get(store.content_payload_key, "")
+        if article := ARTICLE_PATTERN.search(text):
+            queries.append({
+                "kind": "article",
+                "query": f"madde {article.group(1)} " + " ".join(long_words(text, 3, rng)),
+                "relevant": [point.id],
+            })
+        words = long_words(text, 4, rng)
+        if len(words) == 4:
+            queries.append({"kind": "terms", "query": " ".join(words), "relevant": [point.id]})
+    return queries
+
+
+def dense(vector: list[float], k: int) -> list:
+    return store.client.query_points(
+        collection_name=args.collection, query=vector, using=store.vector_name or None, limit=k
+    ).points
+
+
+def hybrid(vector: list[float], query: str, k: int) -> list:
+    return [document.metadata["_id"] for document, _ in search._query(vector, query, k, None)]
+
+
+if args.queries:
+    with open(args.queries, encoding="utf-8") as f:
+        queries = [{"kind": "file", **json.loads(line)} for line in f if line.strip()]
+else:
+    queries = synthetic_queries(args.samples)
+
+print(f"{len(queries)} queries on '{args.collection}'")
+vectors = [store.embeddings.embed_query(query["query"]) for query in queries]
+
+results = {"dense": {"hits": {k: 0 for k in KS}, "ms": []}, "hybrid": {"hits": {k: 0 for k in KS}, "ms": []}}
+kinds = {}
+
+for query, vector in zip(queries, vectors):
+    relevant = set(query["relevant"])
+    kind = kinds.setdefault(query["kind"], {"count": 0, "dense": 0, "hybrid": 0})
+    kind["count"] += 1
+
+    start = time.perf_counter()
+    dense_ids = [point.id for point in dense(vector, max(KS))]
+    results["dense"]["ms"].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    hybrid_ids = hybrid(vector, query["query"], max(KS))
+    results["hybrid"]["ms"].append((time.perf_counter() - start) * 1000)
+
+    for mode, ids in (("dense", dense_ids), ("hybrid", hybrid_ids)):
+        for k in KS:
+            if relevant & set(ids[:k]):
+                results[mode]["hits"][k] += 1
+        if relevant & set(ids[:5]):
+            kind[mode] += 1
+
+print(f"\n{'mode':<8} " + " ".join(f"{f'R@{k}':>7}" for k in KS) + f" {'p50 ms':>8} {'p95 ms':>8}")
+for mode, values in results.items():
+    latencies = sorted(values["ms"])
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{mode:<8} " + " ".join(f"{values['hits'][k] / len(queries):>7.2%}" for k in KS)
+        + f" {statistics.median(latencies):>8.1f} {p95:>8.1f}"
+    )
+
+print("\nR@5 by query kind:")
+for name, kind in kinds.items():
+    print(f"  {name:<8} n={kind['count']:<4} dense {kind['dense'] / kind['count']:.2%}  hybrid {kind['hybrid'] / kind['count']:.2%}")
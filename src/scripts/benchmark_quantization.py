@@ -0,0 +1,155 @@
+"""
+Measure what vector quantization saves and costs on a collection.
+
+For each query the exact (brute-force, unquantized) top k is the baseline,
+and these modes are compared against it:
+
+    float       HNSW on the original vectors, quantization ignored
+    quantized   HNSW on the quantized vectors, no rescoring
+    rescored    quantized, oversampling * k candidates rescored with the
+                originals (one row per --oversampling value)
+
+Queries are the stored vectors of sampled points, with the point itself
+excluded from every result, or the texts of a JSONL file ({"query": ...})
+embedded with text-embedding-3-large. Modes are interleaved per query, so
+cache warm-up affects them alike.
+
+RAM per million chunks is estimated from the collection configuration:
+dense vectors held in RAM (the originals unless on disk, plus the quantized
+copy) and the level-0 HNSW links (2 * m ids of 4 bytes per point). Payloads
+and sparse vectors are not counted.
+
+Usage:
+    PYTHONPATH=src python src/scripts/benchmark_quantization.py [collection] [--queries file.jsonl]
+        [--samples 200] [--k 10] [--oversampling 1.5,3.0]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from qdrant_client import QdrantClient, models
+
+from core.quantization import BYTES_PER_DIMENSION, DEFAULT_OVERSAMPLING, collection_quantization, quantization_search_params
+from settings import settings
+
+parser = argparse.ArgumentParser()
+parser.add_argument("collection", nargs="?", default="courses")
+parser.add_argument("--queries")
+parser.add_argument("--samples", type=int, default=200)
+parser.add_argument("--k", type=int, default=10)
+parser.add_argument("--oversampling", help="Comma-separated oversampling factors to compare")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+client = QdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key, timeout=120)
+
+info = client.get_collection(args.collection)
+vectors_config = info.config.params.vectors
+params = vectors_config.get("") if isinstance(vectors_config, dict) else vectors_config
+quantization = collection_quantization(info)
+hnsw_m = info.config.hnsw_config.m
+
+
+def ram_per_million(kind: str, originals_on_disk: bool) -> float:
+    """Estimated RAM in GB for one million points."""
+    per_point = 0 if originals_on_disk else params.size * 4
+    if kind != "none":
+        per_point += params.size * BYTES_PER_DIMENSION[kind]
+    per_point += 2 * hnsw_m * 4
+    return per_point * 1_000_000 / 1e9
+
+
+def dense_vector(point) -> list[float]:
+    return point.vector.get("") if isinstance(point.vector, dict) else point.vector
+
+
+def sampled_queries() -> list[tuple[list[float], object]]:
+    rng = random.Random(args.seed)
+    points, _ = client.scroll(args.collection, limit=2000, with_payload=False, with_vectors=True)
+    return [(dense_vector(point), point.id) for point in rng.sample(points, min(args.samples, len(points)))]
+
+
+def file_queries() -> list[tuple[list[float], object]]:
+    from core.embedding_cache import cached_openai_embeddings
+
+    with open(args.queries, encoding="utf-8") as f:
+        texts = [json.loads(line)["query"] for line in f if line.strip()]
+    embeddings = cached_openai_embeddings(model="text-embedding-3-large")
+    return [(embeddings.embed_query(text), None) for text in texts]
+
+
+def search(vector: list[float], exclude, search_params: models.SearchParams) -> tuple[list, float]:
+    query_filter = models.Filter(must_not=[models.HasIdCondition(has_id=[exclude])]) if exclude is not None else None
+    start = time.perf_counter()
+    points = client.query_points(
+        collection_name=args.collection,
+        query=vector,
+        query_filter=query_filter,
+        search_params=search_params,
+        limit=args.k,
+        with_payload=False,
+    ).points
+    return [point.id for point in points], (time.perf_counter() - start) * 1000
+
+
+print(
+    f"Collection '{args.collection}': {info.points_count} points, {params.size} dimensions, "
+    f"{quantization} quantization, originals {'on disk' if params.on_disk else 'in RAM'}, hnsw m={hnsw_m}"
+)
+
+layouts = {
+    "float32 in RAM": ("none", False),
+    "scalar, originals on disk": ("scalar", True),
+    "binary, originals on disk": ("binary", True),
+}
+if quantization in BYTES_PER_DIMENSION:
+    layouts = {"this collection": (quantization, bool(params.on_disk)), **layouts}
+
+print("\nEstimated RAM per 1M chunks (dense vectors + HNSW links):")
+for label, (kind, originals_on_disk) in layouts.items():
+    print(f"  {label:<28} {ram_per_million(kind, originals_on_disk):>7.2f} GB")
+
+modes = {
+    "exact": models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True)),
+    "float": models.SearchParams(quantization=models.QuantizationSearchParams(ignore=True)),
+}
+if quantization == "none":
+    print("\nThe collection is not quantized; run src/scripts/quantize_collection.py to compare quantized search")
+else:
+    modes["quantized"] = models.SearchParams(quantization=models.QuantizationSearchParams(rescore=False))
+    if args.oversampling:
+        factors = [float(factor) for factor in args.oversampling.split(",")]
+    else:
+        factors = [DEFAULT_OVERSAMPLING.get(quantization, 2.0)]
+    for factor in factors:
+        modes[f"rescored x{factor:g}"] = quantization_search_params(quantization, factor, rescore=True)
+
+queries = file_queries() if args.queries else sampled_queries()
+print(f"\n{len(queries)} queries, top {args.k}")
+
+# Load the index and quantized vectors before timing
+for search_params in modes.values():
+    search(queries[0][0], queries[0][1], search_params)
+
+results = {mode: {"recall": [], "ms": []} for mode in modes}
+for vector, exclude in queries:
+    baseline = None
+    for mode, search_params in modes.items():
+        ids, ms = search(vector, exclude, search_params)
+        if baseline is None:
+            baseline = set(ids)
+        results[mode]["ms"].append(ms)
+        if baseline:
+            results[mode]["recall"].append(len(baseline & set(ids)) / len(baseline))
+
+print(f"\n{'mode':<16} {f'R@{args.k}':>7} {'p50 ms':>8} {'p99 ms':>8}")
+for mode, values in results.items():
+    latencies = sorted(values["ms"])
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{mode:<16} {statistics.mean(values['recall']) if values['recall'] else 0:>7.2%} "
+        f"{statistics.median(latencies):>8.1f} {p99:>8.1f}"
+    )
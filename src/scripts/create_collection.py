@@ -6,8 +6,12 @@ from qdrant_client.models import (
     TextIndexParams,
     TokenizerType,
     PayloadSchemaType,
+    Modifier,
+    SparseVectorParams,
 )
 
+from core.quantization import quantization_config
+
 # Initialize Qdrant client
 qdrant_url = os.getenv("QDRANT_URL", "")
 qdrant_api_key = os.getenv("QDRANT_API_KEY", "")
@@ -15,16 +19,24 @@ qdrant_api_key = os.getenv("QDRANT_API_KEY", "")
 client = QdrantClient(url=qdrant_url, api_key=qdrant_api_key)
 
 collection_name = "courses"
+# "none", "scalar" (int8, 4x less RAM) or "binary" (32x less RAM); see core/quantization.py
+quantization = os.getenv("VECTOR_QUANTIZATION", "scalar")
 
-print(f"Creating collection '{collection_name}'...")
+print(f"Creating collection '{collection_name}' ({quantization} quantization)...")
 
 client.create_collection(
     collection_name=collection_name,
     vectors_config=VectorParams(
         size=3072,
         distance=Distance.COSINE,
-        on_disk=False,
+        # Quantized vectors stay in RAM; the originals are only read for rescoring
+        on_disk=quantization != "none",
     ),
+    quantization_config=quantization_config(quantization, always_ram=True),
+    # BM25 vectors for hybrid search (core/hybrid_search.py); Qdrant applies the IDF
+    sparse_vectors_config={
+        os.getenv("SPARSE_VECTOR_NAME", "bm25"): SparseVectorParams(modifier=Modifier.IDF),
+    },
     hnsw_config={
         "m": 24,
         "ef_construct": 256,
@@ -0,0 +1,120 @@
+"""
+Measure how many serialized checkpoint bytes each conversation turn writes.
+
+Builds the orchestrator topology (router node -> create_agent subgraph) with
+a scripted chat model and a tool returning a regulation-sized payload, then
+runs the same conversation with three subagent configurations:
+
+    own saver:   compiled with its own InMemorySaver, as scrapper_agent.py /
+                 yonetmelik_agent.py used to be. Inside a parent graph the
+                 subgraph checkpoints go to the parent's saver anyway, under
+                 a new "<node>:<task id>" namespace every turn.
+    inherited:   checkpointer=None; same writes as above.
+    parent only: checkpointer=False; the subagent's messages are persisted
+                 once, in the orchestrator's checkpoint (what the app uses).
+
+Runs offline; no API keys are needed.
+
+Usage:
+    python src/scripts/measure_checkpoint_bytes.py [turns]
+"""
+
+import sys
+from typing import Annotated, TypedDict
+
+from langchain.agents import create_agent
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph, add_messages
+
+TURNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+# Roughly the size of one query_school_regulations result (5 chunks)
+REGULATION_PAYLOAD = "Madde 12 - (1) Mazeret sınavına girebilmek için ... " * 80
+
+
+class CountingSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer that counts the bytes it produces."""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_written = 0
+
+    def dumps_typed(self, obj):
+        type_, data = super().dumps_typed(obj)
+        self.bytes_written += len(data)
+        return type_, data
+
+
+class ScriptedModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+    next_agent: str
+
+
+@tool
+def query_school_regulations(query: str) -> str:
+    """Search the school regulations."""
+    return REGULATION_PAYLOAD
+
+
+def scripted_replies():
+    turn = 0
+    while True:
+        turn += 1
+        yield AIMessage(
+            content="",
+            tool_calls=[{"name": "query_school_regulations", "args": {"query": f"soru {turn}"}, "id": f"call_{turn}"}]
+        )
+        yield AIMessage(content=f"Yönetmeliğe göre cevap {turn}. " * 20)
+
+
+def build(subagent_checkpointer):
+    agent = create_agent(
+        model=ScriptedModel(messages=scripted_replies()),
+        tools=[query_school_regulations],
+        checkpointer=subagent_checkpointer,
+    )
+
+    workflow = StateGraph(State)
+    workflow.add_node("router", lambda state: {"next_agent": "yonetmelik_agent"})
+    workflow.add_node("yonetmelik_agent", agent)
+    workflow.add_edge(START, "router")
+    workflow.add_edge("router", "yonetmelik_agent")
+    workflow.add_edge("yonetmelik_agent", END)
+    return workflow
+
+
+def measure(subagent_checkpointer) -> list[int]:
+    serde = CountingSerializer()
+    graph = build(subagent_checkpointer).compile(checkpointer=InMemorySaver(serde=serde))
+    config = {"configurable": {"thread_id": "measure"}}
+
+    per_turn = []
+    for turn in range(TURNS):
+        before = serde.bytes_written
+        graph.invoke({"messages": [{"role": "user", "content": f"Mazeret sınavı şartları nelerdir? ({turn})"}]}, config)
+        per_turn.append(serde.bytes_written - before)
+    return per_turn
+
+
+results = {
+    "own saver": measure(InMemorySaver()),
+    "inherited": measure(None),
+    "parent only": measure(False),
+}
+
+print(f"{'turn':>4} " + " ".join(f"{name:>12}" for name in results))
+for turn, row in enumerate(zip(*results.values()), 1):
+    print(f"{turn:>4} " + " ".join(f"{value:>12,}" for value in row))
+print(f"{'sum':>4} " + " ".join(f"{sum(values):>12,}" for values in results.values()))
+
+baseline = sum(results["own saver"])
+print(f"parent only writes {1 - sum(results['parent only']) / baseline:.0%} fewer bytes than own saver")
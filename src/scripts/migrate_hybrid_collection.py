@@ -0,0 +1,147 @@
+"""
+Copy a dense-only collection into one with BM25 sparse vectors for hybrid search.
+
+Qdrant cannot add a vector to an existing collection, so the points are
+copied, with their dense vectors, into "<collection>_hybrid", which gets the
+same vector, HNSW and payload index configuration plus the sparse vector.
+With --swap the name is then pointed at the copy, so the application picks
+it up without configuration changes:
+
+- if the name is already an alias, it is moved to the copy in a single
+  atomic update_collection_aliases call, and the collection it pointed to
+  is deleted only after that;
+- if the name is a collection, the copy is checked to hold every point,
+  the collection is deleted and an alias with its name is created right
+  away (an alias cannot share its name with a live collection). From then
+  on the name is an alias and later migrations swap atomically.
+
+Usage:
+    PYTHONPATH=src python src/scripts/migrate_hybrid_collection.py <collection> [--swap]
+"""
+
+import os
+import sys
+import time
+
+from qdrant_client import QdrantClient, models
+
+from core.hybrid_search import sparse_vectors_config
+from core.sparse import TurkishBM25
+from settings import settings
+
+BATCH_SIZE = 256
+
+if len(sys.argv) < 2:
+    print(__doc__)
+    sys.exit(1)
+
+collection_name = sys.argv[1]
+swap = "--swap" in sys.argv[2:]
+target_name = f"{collection_name}_hybrid"
+
+client = QdrantClient(url=os.getenv("QDRANT_URL", "").strip(), api_key=os.getenv("QDRANT_API_KEY", "").strip(), timeout=120)
+sparse = TurkishBM25()
+
+info = client.get_collection(collection_name)
+if settings.sparse_vector_name in (info.config.params.sparse_vectors or {}):
+    print(f"✓ Collection '{collection_name}' already has sparse vector '{settings.sparse_vector_name}'")
+    sys.exit(0)
+
+print(f"Creating collection '{target_name}'...")
+client.create_collection(
+    collection_name=target_name,
+    vectors_config=info.config.params.vectors,
+    sparse_vectors_config=sparse_vectors_config(settings.sparse_vector_name),
+    hnsw_config=models.HnswConfigDiff(**info.config.hnsw_config.model_dump()),
+    quantization_config=info.config.quantization_config,
+    on_disk_payload=info.config.params.on_disk_payload,
+)
+
+for field_name, schema in (info.payload_schema or {}).items():
+    print(f"  - Creating index for {field_name} ({schema.data_type})...")
+    client.create_payload_index(
+        collection_name=target_name,
+        field_name=field_name,
+        field_schema=schema.params or schema.data_type,
+    )
+
+print(f"Copying {info.points_count} points...")
+copied = 0
+offset = None
+while True:
+    points, offset = client.scroll(
+        collection_name=collection_name,
+        limit=BATCH_SIZE,
+        offset=offset,
+        with_payload=True,
+        with_vectors=True,
+    )
+    if not points:
+        break
+
+    texts = [(point.payload or {}).get("page_content", "") for point in points]
+    sparse_vectors = sparse.embed_documents(texts)
+
+    batch = []
+    for point, vector in zip(points, sparse_vectors):
+        # Unnamed dense vectors come back as a plain list; "" is their name in a vector dict
+        vectors = dict(point.vector) if isinstance(point.vector, dict) else {"": point.vector}
+        vectors[settings.sparse_vector_name] = models.SparseVector(indices=vector.indices, values=vector.values)
+        batch.append(models.PointStruct(id=point.id, vector=vectors, payload=point.payload))
+
+    client.upsert(collection_name=target_name, points=batch)
+    copied += len(batch)
+    print(f"  {copied}/{info.points_count}")
+
+    if offset is None:
+        break
+
+print(f"✓ Copied {copied} points into '{target_name}'")
+
+
+def create_alias_operation() -> models.CreateAliasOperation:
+    return models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=target_name, alias_name=collection_name)
+    )
+
+
+if swap:
+    source_count = client.count(collection_name, exact=True).count
+    target_count = client.count(target_name, exact=True).count
+    if target_count != source_count:
+        print(f"✗ '{target_name}' has {target_count} points, '{collection_name}' {source_count}; not swapping")
+        sys.exit(1)
+
+    aliases = {alias.alias_name: alias.collection_name for alias in client.get_aliases().aliases}
+
+    if collection_name in aliases:
+        previous = aliases[collection_name]
+        print(f"Moving alias '{collection_name}' from '{previous}' to '{target_name}'...")
+        client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=collection_name)),
+            create_alias_operation(),
+        ])
+        print(f"✓ '{collection_name}' now points to '{target_name}'")
+        print(f"Deleting '{previous}'...")
+        client.delete_collection(previous)
+        print(f"✓ Deleted '{previous}'")
+    else:
+        print(f"Replacing collection '{collection_name}' with an alias to '{target_name}'...")
+        client.delete_collection(collection_name)
+        for attempt in range(5):
+            try:
+                client.update_collection_aliases(change_aliases_operations=[create_alias_operation()])
+                break
+            except Exception as e:
+                print(f"  alias creation failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+        else:
+            print(
+                f"✗ '{collection_name}' is missing; its data is in '{target_name}'. Create the alias with:\n"
+                f"  client.update_collection_aliases(change_aliases_operations=[models.CreateAliasOperation("
+                f"create_alias=models.CreateAlias(collection_name='{target_name}', alias_name='{collection_name}'))])"
+            )
+            sys.exit(1)
+        print(f"✓ '{collection_name}' now points to '{target_name}'")
+else:
+    print(f"Run again with --swap to delete '{collection_name}' and alias it to '{target_name}'")
@@ -0,0 +1,45 @@
+"""
+Change the quantization of an existing collection in place.
+
+Quantized collections keep the compressed vectors in RAM and move the
+original vectors to disk; "none" removes the quantization and loads the
+originals back into RAM. Qdrant rebuilds the quantized vectors in the
+background while searches keep working; the retrieval tools pick up the
+new configuration on their next start.
+
+Usage:
+    PYTHONPATH=src python src/scripts/quantize_collection.py <collection> <none|scalar|binary>
+"""
+
+import os
+import sys
+
+from qdrant_client import QdrantClient, models
+
+from core.quantization import QUANTIZATION_KINDS, collection_quantization, quantization_config
+
+if len(sys.argv) < 3 or sys.argv[2] not in QUANTIZATION_KINDS:
+    print(__doc__)
+    sys.exit(1)
+
+collection_name, quantization = sys.argv[1], sys.argv[2]
+
+client = QdrantClient(url=os.getenv("QDRANT_URL", "").strip(), api_key=os.getenv("QDRANT_API_KEY", "").strip(), timeout=120)
+
+info = client.get_collection(collection_name)
+current = collection_quantization(info)
+if current == quantization:
+    print(f"✓ Collection '{collection_name}' already uses {quantization} quantization")
+    sys.exit(0)
+
+print(f"Switching '{collection_name}' from {current} to {quantization} quantization...")
+client.update_collection(
+    collection_name=collection_name,
+    # "" is the unnamed dense vector
+    vectors_config={"": models.VectorParamsDiff(on_disk=quantization != "none")},
+    quantization_config=quantization_config(quantization) or models.Disabled.DISABLED,
+)
+
+info = client.get_collection(collection_name)
+print(f"✓ Collection '{collection_name}' now uses {collection_quantization(info)} quantization")
+print(f"  - Status: {info.status} (optimizers rebuild the vectors in the background)")
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +7,90 @@ class Settings(BaseSettings):
     qdrant_api_key: str
     qdrant_url: str
 
+    # Shared Playwright browser pool used by the school website tools
+    browser_pool_size: int = 1
+    browser_pages_per_browser: int = 4
+    browser_recycle_after: int = 100
+    browser_acquire_timeout: float = 30.0
+    # Seconds a single scraping tool call may spend waiting (pool + page)
+    scrape_latency_budget: float = 20.0
+
+    # Cache of parsed announcement lists / pages
+    announcement_cache_ttl: float = 600.0
+    announcement_cache_max_bytes: int = 32 * 1024 * 1024
+
+    # Disk cache of parsed PDF attachments
+    pdf_cache_dir: str = ".cache/pdf"
+    pdf_cache_max_bytes: int = 512 * 1024 * 1024
+    pdf_cache_fresh_for: float = 300.0
+
+    # Persistent cache of document embeddings
+    embedding_cache_dir: str = ".cache/embeddings"
+    # In-process LRU of query embeddings used by the retrieval tools
+    query_embedding_cache_size: int = 2048
+    query_embedding_cache_ttl: Optional[float] = None
+
+    # Hybrid dense + BM25 retrieval, fused with RRF in Qdrant; collections
+    # without the sparse vector fall back to dense search
+    hybrid_search: bool = True
+    sparse_vector_name: str = "bm25"
+    hybrid_prefetch_limit: int = 40
+    # Default search type of the regulation and course tools: "similarity",
+    # or "mmr" for a diverse top k re-ranked from mmr_fetch_k candidates
+    regulation_search_type: str = "similarity"
+    course_search_type: str = "similarity"
+    mmr_fetch_k: int = 30
+    mmr_lambda: float = 0.5
+    # Searches on quantized collections: candidates per result rescored with
+    # the original vectors (None: 1.5 for scalar, 3.0 for binary)
+    quantization_oversampling: Optional[float] = None
+    quantization_rescore: bool = True
+
+    # Per-course semantic answer cache of the course helper
+    answer_cache_similarity: float = 0.95
+    answer_cache_max_entries: int = 256
+    answer_cache_ttl: float = 24 * 3600.0
+    # Invalidation counters shared by the worker processes
+    answer_cache_versions_path: str = ".cache/answer_cache_versions.sqlite"
+
+    # Course helper prompt budget in tokens (system prompt, context, history and
+    # question); older turns are folded into a summary of at most this size
+    course_prompt_max_tokens: int = 8000
+    course_summary_max_tokens: int = 400
+    # Token budget for the retrieved documents within that prompt
+    course_context_max_tokens: int = 3000
+    # Metadata keys shown with each retrieved passage (citation fields only)
+    course_context_metadata_fields: list[str] = ["title", "source", "page_label"]
+
+    # Local keyword / embedding-centroid router in front of the routing LLM
+    router_fast_path: bool = True
+    router_centroid_enabled: bool = True
+    router_centroid_margin: float = 0.04
+    # Follow-ups keep the previous agent unless the topic shifts (keywords or a
+    # confident centroid for the other agent, or a long message not opening
+    # with a follow-up marker)
+    router_sticky: bool = True
+    router_follow_up_max_words: int = 12
+
+    # Subagent prompts: tool outputs of earlier turns become short digests and
+    # the conversation sent to the model is capped at this many tokens
+    agent_history_max_tokens: int = 8000
+    agent_tool_digest_chars: int = 200
+
+    # Checkpoints of the graphs: backend ("memory" or "sqlite"), idle TTL,
+    # memory cap (memory backend) and checkpoints kept per thread
+    checkpoint_backend: str = "memory"
+    checkpoint_dir: str = ".cache/checkpoints"
+    checkpoint_ttl: Optional[float] = 6 * 3600.0
+    checkpoint_max_bytes: Optional[int] = 256 * 1024 * 1024
+    checkpoint_keep_per_thread: Optional[int] = 1
+    # Checkpoint serializer ("compact" or "jsonplus"); compact deduplicates messages
+    # per thread and zstd-compresses payloads from this size on
+    checkpoint_serializer: str = "compact"
+    checkpoint_compress_min_bytes: int = 4096
+    # Bulky per-thread payloads referenced from graph state; expire with the thread
+    blob_store_dir: str = ".cache/blobs"
+
     class Config:
         env_file = "../dev.env"
 